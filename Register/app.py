@@ -1,9 +1,38 @@
-from flask import Flask, render_template, redirect, url_for
-from system import EmployeeScheduler
-from typing import Dict, List
+from flask import Flask, render_template, url_for, request, jsonify, abort, Response
+from markupsafe import Markup
+from collections import OrderedDict
+from contextlib import nullcontext
+from system import EmployeeScheduler, EmployeeSchedulerError, ShiftRequirements, schedule_cache
+from typing import Any, Dict, List
+import instrumentation
+import jobs
+import json
+import logging
+import os
+import roster
+import scenarios
+import threading
 import time
 
 app = Flask(__name__)
+# Set to False to hide /metrics
+app.config.setdefault('METRICS_ENABLED', True)
+
+logger = logging.getLogger(__name__)
+
+# Background schedule generation for POST /jobs
+job_queue = jobs.JobQueue(max_workers=2, max_pending=32)
+
+# Largest values POST /jobs accepts, anything bigger is rejected with a 400
+# before it reaches the queue
+MAX_JOB_DAYS = 366
+MAX_JOB_MIN_EMPLOYEES = 1000
+MAX_JOB_TIME_BUDGET = 60.0
+
+# Rendered schedule tables by schedule version, most recently used last
+SCHEDULE_FRAGMENTS_MAX = 32
+_schedule_fragments: "OrderedDict[str, Markup]" = OrderedDict()
+_schedule_fragments_lock = threading.Lock()
 
 def format_shift_data(schedule: Dict) -> List[List[List[str]]]:
     """
@@ -22,23 +51,253 @@ def format_shift_data(schedule: Dict) -> List[List[List[str]]]:
         formatted_data.append(day_shifts)
     return formatted_data
 
+def render_schedule_table(version: str, scheduler: EmployeeScheduler) -> Markup:
+    """
+    The rendered schedule table for a schedule version
+
+    Rendered once per version, later calls return the cached fragment without
+    calculating the schedule or running the template.
+    """
+    with _schedule_fragments_lock:
+        fragment = _schedule_fragments.get(version)
+        if fragment is not None:
+            _schedule_fragments.move_to_end(version)
+            return fragment
+
+    schedule = scheduler.calculate_shifts_cached()
+    fragment = Markup(render_template('schedule_table.html', schedule=format_shift_data(schedule)))
+    # Only cache it if the roster didn't change underneath us mid-render
+    if scheduler.schedule_version() != version:
+        return fragment
+    with _schedule_fragments_lock:
+        _schedule_fragments[version] = fragment
+        while len(_schedule_fragments) > SCHEDULE_FRAGMENTS_MAX:
+            _schedule_fragments.popitem(last=False)
+    return fragment
+
 @app.route('/populate')
 def populate():
+    # ?profile=cprofile or ?profile=tracemalloc profiles this request, the
+    # report is logged and served at /metrics/profile
+    profiler = request.args.get('profile')
+    if profiler and profiler not in instrumentation.PROFILERS:
+        return render_template('index.html', error=f"Unknown profiler '{profiler}'")
+
     time_start = time.time()
     try:
-        scheduler = EmployeeScheduler()
-        schedule = scheduler.calculate_shifts()
-        formatted_data = format_shift_data(schedule)
+        with instrumentation.profile(profiler) if profiler else nullcontext() as report:
+            scheduler = EmployeeScheduler()
+            schedule_table = render_schedule_table(scheduler.schedule_version(), scheduler)
+        if report is not None:
+            instrumentation.metrics.last_profile = report.text
+            logger.info(f"Profile for /populate ({profiler}):\n{report.text}")
         time_end = time.time()
         print(f'Population took {time_end - time_start:.9f} seconds')
-        return render_template('index.html', schedule=formatted_data)
+        return render_template('index.html', schedule_table=schedule_table)
     except Exception as e:
         return render_template('index.html', error=str(e))
-    
+
+def compact_schedule(schedule: Dict, days: int, shifts_per_day: int) -> Dict[str, Any]:
+    """
+    Schedule as employee ids plus a name table
+
+    Each name is sent once, ids index into 'names' in order of first
+    appearance, and 'shifts' is a days x shifts_per_day grid of id lists.
+    """
+    ids: Dict[str, int] = {}
+    shifts = []
+    for day in range(days):
+        day_shifts = []
+        for shift in range(shifts_per_day):
+            day_shifts.append([
+                ids.setdefault(emp.get_name(), len(ids))
+                for emp in schedule.get(day, {}).get(shift, [])
+            ])
+        shifts.append(day_shifts)
+    return {'names': list(ids), 'shifts': shifts}
+
+@app.route('/api/schedule')
+def api_schedule():
+    """
+    Current schedule as compact JSON
+
+    The ETag is the schedule version, a request whose If-None-Match still
+    matches it gets 304 Not Modified without the schedule being calculated.
+    """
+    try:
+        scheduler = EmployeeScheduler()
+        version = scheduler.schedule_version()
+        if request.if_none_match.contains(version):
+            response = Response(status=304)
+        else:
+            requirements = scheduler.shift_requirements
+            body = compact_schedule(scheduler.calculate_shifts_cached(),
+                                    requirements.days, requirements.shifts_per_day)
+            body['version'] = version
+            response = Response(json.dumps(body, separators=(',', ':')), mimetype='application/json')
+    except EmployeeSchedulerError as e:
+        return jsonify({'error': str(e)}), 500
+    response.set_etag(version)
+    # Clients may keep it, but have to check it's still current before use
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+# Most scenarios one POST /api/scenarios request may evaluate
+MAX_SCENARIOS = 500
+
+@app.route('/api/scenarios', methods=['POST'])
+def api_scenarios():
+    """
+    Compare what-if scenarios against the current roster
+
+    The JSON body is {"scenarios": [...]}, each in the form
+    scenarios.Scenario.from_dict reads. Returns a comparison table with the
+    baseline first.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        variants = [scenarios.Scenario.from_dict(item) for item in data.get('scenarios', [])]
+    except (KeyError, TypeError, ValueError) as e:
+        return jsonify({'error': f"Invalid scenario: {e}"}), 400
+    if len(variants) > MAX_SCENARIOS:
+        return jsonify({'error': f"At most {MAX_SCENARIOS} scenarios per request"}), 400
+
+    try:
+        runner = scenarios.ScenarioRunner()
+    except EmployeeSchedulerError as e:
+        return jsonify({'error': str(e)}), 500
+    results = runner.evaluate_many(variants)
+    return jsonify({'table': scenarios.comparison_table(results)})
+
+@app.route('/metrics')
+def metrics():
+    """Scheduler timings per phase and slot, plus cache counters, as JSON"""
+    if not app.config['METRICS_ENABLED']:
+        abort(404)
+    return jsonify({
+        'scheduler': instrumentation.metrics.snapshot(),
+        'schedule_cache': schedule_cache.stats(),
+        'roster_cache': {'hits': roster.roster_cache.hits, 'misses': roster.roster_cache.misses},
+    })
+
+@app.route('/metrics/profile')
+def metrics_profile():
+    """Report from the most recent profiled request"""
+    if not app.config['METRICS_ENABLED'] or instrumentation.metrics.last_profile is None:
+        abort(404)
+    return Response(instrumentation.metrics.last_profile, mimetype='text/plain')
+
+
+def names_schedule(schedule: Dict) -> Dict[int, Dict[int, List[str]]]:
+    """Schedule with employee names instead of Employee objects"""
+    return {
+        day: {shift: [emp.get_name() for emp in emps] for shift, emps in shifts.items()}
+        for day, shifts in schedule.items()
+    }
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """
+    Queue a schedule calculation and return its job id straight away
+
+    The optional JSON body can set engine, solver, time_budget, min_employees
+    and days. Submitting the same job while an identical one is still queued or
+    running returns the existing job.
+    """
+    options = request.get_json(silent=True) or {}
+    try:
+        requirements = ShiftRequirements(
+            min_employees=int(options.get('min_employees', ShiftRequirements.min_employees)),
+            days=int(options.get('days', ShiftRequirements.days)),
+        )
+        scheduler = EmployeeScheduler(
+            engine=options.get('engine', 'python'),
+            solver=options.get('solver', 'greedy'),
+            time_budget=float(options.get('time_budget', 1.0)),
+            shift_requirements=requirements,
+        )
+        _check_job_bounds(requirements, scheduler.time_budget)
+        stat = os.stat(scheduler.file_path)
+    except (EmployeeSchedulerError, OSError, TypeError, ValueError) as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Cheap identity for de-duplication, no need to parse the roster here
+    key = (os.path.abspath(scheduler.file_path), stat.st_mtime_ns, stat.st_size,
+           requirements.cache_key(), scheduler.engine, scheduler.solver, scheduler.time_budget)
+
+    def run(progress: jobs.Progress) -> Dict[int, Dict[int, List[str]]]:
+        solved = []
+
+        def on_slot(day, shift, assigned):
+            solved.append((day, shift))
+            progress({
+                'day': day,
+                'shift': shift,
+                'employees': [emp.get_name() for emp in assigned] if assigned else [],
+            })
+
+        scheduler.on_slot = on_slot
+        schedule = scheduler.calculate_shifts_cached()
+        if not solved:
+            # Served from the cache, nothing was solved: report every slot of it
+            for day in range(requirements.days):
+                for shift in range(requirements.shifts_per_day):
+                    on_slot(day, shift, schedule.get(day, {}).get(shift))
+        return names_schedule(schedule)
+
+    try:
+        job, created = job_queue.submit(key, run)
+    except jobs.JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+
+    body = job.to_dict(include_result=False)
+    body['deduplicated'] = not created
+    return jsonify(body), 202, {'Location': url_for('get_job', job_id=job.id)}
+
+def _check_job_bounds(requirements: ShiftRequirements, time_budget: float) -> None:
+    """Raise ValueError if a job's options are outside what POST /jobs accepts"""
+    if not 1 <= requirements.days <= MAX_JOB_DAYS:
+        raise ValueError(f"days must be between 1 and {MAX_JOB_DAYS}")
+    if not 0 <= requirements.min_employees <= MAX_JOB_MIN_EMPLOYEES:
+        raise ValueError(f"min_employees must be between 0 and {MAX_JOB_MIN_EMPLOYEES}")
+    # Also rejects NaN
+    if not 0 < time_budget <= MAX_JOB_TIME_BUDGET:
+        raise ValueError(f"time_budget must be more than 0 and at most {MAX_JOB_TIME_BUDGET:g} seconds")
+
+@app.route('/jobs/<job_id>')
+def get_job(job_id: str):
+    """Job status, with the schedule once it is done"""
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id: str):
+    """Server-sent events: one per completed slot, then a final status event"""
+    job = job_queue.get(job_id)
+    if job is None:
+        abort(404)
+
+    def stream():
+        sent = 0
+        while True:
+            events, finished = job.wait_events(sent, timeout=15.0)
+            for event in events:
+                yield f"event: slot\ndata: {json.dumps(event)}\n\n"
+            sent += len(events)
+            if finished:
+                yield f"event: {job.status}\ndata: {json.dumps(job.to_dict())}\n\n"
+                return
+            if not events:
+                yield ": keep-alive\n\n"
+
+    return Response(stream(), mimetype='text/event-stream')
 
 @app.route('/')
 def index():
     return render_template('index.html')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO)
+    app.run(debug=True)
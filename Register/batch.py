@@ -0,0 +1,110 @@
+"""
+Multi-venue batch scheduling.
+
+schedule_many solves one schedule per venue across a process pool. Venues
+given as paths are read by the worker itself, in-memory rosters are sent as a
+PackedRoster rather than pickled Employee objects. Results are yielded as each
+venue finishes, not in submission order.
+
+    python batch.py venues/*.txt --workers 8
+"""
+
+import argparse
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import employee
+import roster
+import system
+
+logger = logging.getLogger(__name__)
+
+# A venue's roster: a CSV path, a packed roster or a list of employees
+RosterSource = Union[str, roster.PackedRoster, Sequence[employee.Employee]]
+
+
+class VenueResult(NamedTuple):
+    """Schedule for one venue, as employee names, or the error that stopped it"""
+    venue: str
+    schedule: Dict[int, Dict[int, List[str]]]
+    error: Optional[str] = None
+
+
+def schedule_many(rosters: Union[Iterable[RosterSource], Dict[str, RosterSource]],
+                  max_workers: Optional[int] = None, engine: str = 'python',
+                  shift_requirements: Optional[system.ShiftRequirements] = None) -> Iterator[VenueResult]:
+    """
+    Schedule several venues in parallel
+
+    Args:
+        rosters: Roster per venue, either a mapping of venue name to roster or
+            an iterable of rosters (paths are used as venue names, others are
+            numbered)
+        max_workers: Worker processes, defaults to the number of CPUs
+        engine: Assignment engine used by every worker
+        shift_requirements: Requirements shared by every venue
+
+    Yields:
+        VenueResult for each venue as soon as it is solved
+    """
+    jobs = list(_venues(rosters))
+    if not jobs:
+        return
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {
+            pool.submit(_solve_venue, venue, source, engine, shift_requirements): venue
+            for venue, source in jobs
+        }
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                # The worker itself died (pickling, broken pool, ...)
+                logger.error(f"Worker failed for venue {futures[future]}: {e}")
+                yield VenueResult(futures[future], {}, str(e))
+
+
+def _venues(rosters: Union[Iterable[RosterSource], Dict[str, RosterSource]]) -> Iterator[Tuple[str, RosterSource]]:
+    """Name every venue and pack in-memory rosters for the trip to a worker"""
+    items = rosters.items() if isinstance(rosters, dict) else (
+        (source if isinstance(source, str) else f"venue-{index}", source)
+        for index, source in enumerate(rosters)
+    )
+    for venue, source in items:
+        if not isinstance(source, (str, roster.PackedRoster)):
+            source = roster.pack_employees(source)
+        yield venue, source
+
+
+def _solve_venue(venue: str, source: Union[str, roster.PackedRoster], engine: str,
+                 shift_requirements: Optional[system.ShiftRequirements]) -> VenueResult:
+    """Worker entry point, solves one venue"""
+    try:
+        if isinstance(source, str):
+            scheduler = system.EmployeeScheduler(source, engine=engine,
+                                                 shift_requirements=shift_requirements)
+        else:
+            scheduler = system.EmployeeScheduler(engine=engine, shift_requirements=shift_requirements,
+                                                 employees=roster.unpack_employees(source))
+        schedule = scheduler.calculate_shifts()
+    except Exception as e:
+        return VenueResult(venue, {}, str(e))
+
+    return VenueResult(venue, {
+        day: {shift: [emp.get_name() for emp in emps] for shift, emps in shifts.items()}
+        for day, shifts in schedule.items()
+    })
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Schedule several venues in parallel")
+    parser.add_argument('paths', nargs='+', help="employee CSV file per venue")
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+    system.main_batch(args.paths, max_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""
+Scheduler benchmarks.
+
+Generates synthetic rosters and times each scheduler phase separately
+(load_employees, sort_employees, _assign_shift, calculate_shifts), along with
+its tracemalloc peak. Results are written as JSON so runs can be compared.
+
+    python bench.py --sizes 100 10000 100000 --density 0.5 --engine python numpy -o bench.json
+
+--startup instead measures cold start of the lightweight cli.py entry point:
+its cumulative import time under -X importtime, best of --runs interpreters,
+against cli.IMPORT_BUDGET_MS, and the wall time of scheduling a small roster
+next to bare `python -c pass`. It exits non-zero when over the budget.
+
+    python bench.py --startup --runs 20
+
+--stress runs many solves at once on threads sharing one loaded scheduler and
+checks every result against the same solve run on its own. It exits non-zero
+on any mismatch.
+
+    python bench.py --stress 200 --threads 16 --sizes 2000 --engine python numpy
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import roster
+import rules
+import system
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DAYS = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+SHIFTS = ('morning', 'evening')
+HEADER = ['name', 'min_hours', 'bar', 'experience', 'opening', 'closing'] + [
+    f"{day}_{shift}" for day in DAYS for shift in SHIFTS
+]
+
+
+def generate_roster(path: str, size: int, density: float = 0.5, seed: int = 0) -> None:
+    """
+    Write a synthetic roster CSV in the employees.txt format
+
+    Args:
+        path: File to write
+        size: Number of employees
+        density: Probability that an employee is available for any given shift
+        seed: Random seed, the same arguments always give the same file
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(HEADER)
+        for index in range(size):
+            writer.writerow(
+                [f"Employee{index}", rng.choice((8, 12, 16, 18, 20, 24, 28, 35)),
+                 rng.random() < 0.4, round(rng.uniform(0.5, 5.0), 1),
+                 rng.random() < 0.3, rng.random() < 0.3]
+                + ['Y' if rng.random() < density else 'N' for _ in range(len(DAYS) * len(SHIFTS))]
+            )
+
+
+def _phases(path: str, engine: str) -> Dict[str, Callable[[], None]]:
+    """Benchmark phases, each one runs on a fresh scheduler with a cold roster cache"""
+
+    def loaded() -> system.EmployeeScheduler:
+        roster.roster_cache.invalidate()
+        scheduler = system.EmployeeScheduler(path, engine=engine)
+        scheduler.load_employees()
+        return scheduler
+
+    def load_employees() -> Callable[[], None]:
+        roster.roster_cache.invalidate()
+        return system.EmployeeScheduler(path, engine=engine).load_employees
+
+    def sort_employees() -> Callable[[], None]:
+        return loaded().sort_employees
+
+    def assign_shift() -> Callable[[], None]:
+        scheduler = loaded()
+        scheduler.sort_employees()
+        context = scheduler._new_run()
+        scheduler._restore_state(context, 0, 0)
+        requirements = context.requirements
+
+        def run() -> None:
+            for day in range(requirements.days):
+                for shift in range(requirements.shifts_per_day):
+                    assigned = scheduler._assign_shift(context, day, shift)
+                    scheduler._record_slot(context, day, shift, assigned)
+        return run
+
+    def calculate_shifts() -> Callable[[], None]:
+        roster.roster_cache.invalidate()
+        return system.EmployeeScheduler(path, engine=engine).calculate_shifts
+
+    return {
+        'load_employees': load_employees,
+        'sort_employees': sort_employees,
+        'assign_shift': assign_shift,
+        'calculate_shifts': calculate_shifts,
+    }
+
+
+def measure(setup: Callable[[], Callable[[], None]], repeat: int) -> Dict[str, float]:
+    """
+    Time a phase and record its memory high-water mark
+
+    setup builds the state the phase needs and returns the callable to
+    measure, only that callable is timed. Timing runs without tracemalloc,
+    then one extra run measures the peak allocation.
+    """
+    timings = []
+    for _ in range(repeat):
+        run = setup()
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+
+    run = setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'best_seconds': min(timings),
+        'mean_seconds': sum(timings) / len(timings),
+        'peak_bytes': peak,
+    }
+
+
+def run_benchmarks(sizes: List[int], densities: List[float], engines: List[str],
+                   repeat: int = 3, seed: int = 0, workdir: Optional[str] = None) -> Dict:
+    """Run every phase for every roster size, density and engine"""
+    results = []
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in sizes:
+            for density in densities:
+                path = os.path.join(tmp, f"roster_{size}_{density}.txt")
+                generate_roster(path, size, density, seed)
+                for engine in engines:
+                    phases = {
+                        name: measure(setup, repeat)
+                        for name, setup in _phases(path, engine).items()
+                    }
+                    results.append({'size': size, 'density': density, 'engine': engine, 'phases': phases})
+                    print(f"size={size} density={density} engine={engine} " + " ".join(
+                        f"{name}={phase['best_seconds']:.4f}s" for name, phase in phases.items()
+                    ), file=sys.stderr)
+                roster.roster_cache.invalidate()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def import_times(module: str) -> Dict[str, int]:
+    """
+    Cumulative import time of every module a fresh interpreter loads for module
+
+    Returns:
+        Microseconds by module name, as reported by -X importtime
+    """
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f"import {module}"],
+                            cwd=HERE, capture_output=True, text=True, check=True)
+    times = {}
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def _wall_times(command: List[str], runs: int) -> List[float]:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=HERE, stdout=subprocess.DEVNULL, check=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_startup(runs: int = 10, size: int = 20, seed: int = 0, workdir: Optional[str] = None) -> Dict:
+    """Import time and cold start wall time of cli.py for a small roster"""
+    import cli
+
+    # Best of several fresh interpreters, a single -X importtime run is noisy
+    samples = [import_times('cli') for _ in range(runs)]
+    times = min(samples, key=lambda sample: sample['cli'])
+    import_ms = times['cli'] / 1000
+    heaviest = sorted(times.items(), key=lambda item: item[1], reverse=True)[1:11]
+
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        path = os.path.join(tmp, 'roster.txt')
+        generate_roster(path, size, seed=seed)
+        bare = _wall_times([sys.executable, '-c', 'pass'], runs)
+        cold = _wall_times([sys.executable, os.path.join(HERE, 'cli.py'), path], runs)
+
+    print(f"import cli={import_ms:.1f}ms (budget {cli.IMPORT_BUDGET_MS}ms) "
+          f"cli={min(cold):.4f}s bare python={min(bare):.4f}s", file=sys.stderr)
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'runs': runs,
+            'size': size,
+        },
+        'import': {
+            'cumulative_ms': import_ms,
+            'median_ms': sorted(sample['cli'] for sample in samples)[len(samples) // 2] / 1000,
+            'budget_ms': cli.IMPORT_BUDGET_MS,
+            'within_budget': import_ms <= cli.IMPORT_BUDGET_MS,
+            'heaviest_ms': {name: us / 1000 for name, us in heaviest},
+            'loaded': sorted(times),
+        },
+        'cold_start': {
+            'cli_best_seconds': min(cold),
+            'cli_mean_seconds': sum(cold) / len(cold),
+            'bare_best_seconds': min(bare),
+            'bare_mean_seconds': sum(bare) / len(bare),
+            'overhead_seconds': min(cold) - min(bare),
+        },
+    }
+
+
+def _names(schedule: Dict) -> Dict[int, Dict[int, List[str]]]:
+    return {day: {shift: [emp.get_name() for emp in team] for shift, team in shifts.items()}
+            for day, shifts in schedule.items()}
+
+
+def run_stress(solves: int = 100, threads: int = 8, sizes: Optional[List[int]] = None,
+               engines: Optional[List[str]] = None, seed: int = 0, workdir: Optional[str] = None) -> Dict:
+    """
+    Run solves concurrently on one shared scheduler and compare them with isolated runs
+
+    Solves alternate between requirement variants, one of them with
+    employee rules, so runs with different state interleave on the same
+    roster and index.
+    """
+    variants = [
+        system.ShiftRequirements(),
+        system.ShiftRequirements(days=14, min_employees_overrides={(5, 1): 8},
+                                 rules=(rules.RestAfterClosing(), rules.MaxConsecutiveShifts(3))),
+    ]
+    results = []
+    # Switch threads as often as possible so runs interleave mid-slot
+    interval = sys.getswitchinterval()
+    with tempfile.TemporaryDirectory(dir=workdir) as tmp:
+        for size in sizes or [1000]:
+            path = os.path.join(tmp, f"roster_{size}.txt")
+            generate_roster(path, size, seed=seed)
+            for engine in engines or ['python']:
+                expected = [
+                    _names(system.EmployeeScheduler(path, engine=engine, shift_requirements=requirements)
+                           .calculate_shifts())
+                    for requirements in variants
+                ]
+                shared = system.EmployeeScheduler(path, engine=engine)
+
+                def solve(number: int) -> bool:
+                    variant = number % len(variants)
+                    try:
+                        return _names(shared.solve(variants[variant]).schedule) == expected[variant]
+                    except system.EmployeeSchedulerError:
+                        # Runs stepping on each other's state tend to fail outright
+                        return False
+
+                sys.setswitchinterval(1e-6)
+                try:
+                    start = time.perf_counter()
+                    with ThreadPoolExecutor(max_workers=threads) as pool:
+                        matches = list(pool.map(solve, range(solves)))
+                    elapsed = time.perf_counter() - start
+                finally:
+                    sys.setswitchinterval(interval)
+
+                mismatches = matches.count(False)
+                results.append({'size': size, 'engine': engine, 'solves': solves, 'threads': threads,
+                                'mismatches': mismatches, 'seconds': elapsed})
+                print(f"size={size} engine={engine} solves={solves} threads={threads} "
+                      f"mismatches={mismatches} {elapsed:.3f}s", file=sys.stderr)
+                roster.roster_cache.invalidate()
+
+    return {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': seed,
+        },
+        'results': results,
+        'mismatches': sum(result['mismatches'] for result in results),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the employee scheduler")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000],
+                        help="roster sizes to generate (default: 100 1000 10000)")
+    parser.add_argument('--density', type=float, nargs='+', default=[0.5],
+                        help="availability densities, 0-1 (default: 0.5)")
+    parser.add_argument('--engine', nargs='+', default=['python'], choices=system.ENGINES,
+                        help="assignment engines to compare (default: python)")
+    parser.add_argument('--repeat', type=int, default=3, help="timed runs per phase (default: 3)")
+    parser.add_argument('--seed', type=int, default=0, help="roster generator seed")
+    parser.add_argument('--workdir', default=None, help="where to write generated rosters")
+    parser.add_argument('-o', '--output', default=None, help="JSON results file (default: stdout)")
+    parser.add_argument('--startup', action='store_true',
+                        help="measure cli.py import time and cold start instead of the phases")
+    parser.add_argument('--runs', type=int, default=10, help="cold starts to time with --startup (default: 10)")
+    parser.add_argument('--stress', type=int, default=0, metavar='SOLVES',
+                        help="run this many concurrent solves on one shared scheduler instead of the phases")
+    parser.add_argument('--threads', type=int, default=8, help="threads for --stress (default: 8)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    if args.startup:
+        report = run_startup(args.runs, seed=args.seed, workdir=args.workdir)
+    elif args.stress:
+        report = run_stress(args.stress, args.threads, args.sizes, args.engine, args.seed, args.workdir)
+    else:
+        report = run_benchmarks(args.sizes, args.density, args.engine, args.repeat, args.seed, args.workdir)
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.stress and report['mismatches']:
+        sys.exit(1)
+    if args.startup and not report['import']['within_budget']:
+        print(f"import cli took {report['import']['cumulative_ms']:.1f}ms, "
+              f"over the {report['import']['budget_ms']}ms budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Binary columnar roster format.
+
+A roster converted from employees.txt is stored as fixed-width little-endian
+columns plus a string table for names:
+
+    header        magic, version, shift count, employee count, column offsets
+    min_hours     int32[n]
+    experience    float64[n]
+    flags         uint8[n]   bit 0 bar, bit 1 opening, bit 2 closing
+    availability  uint64[n]  packed availability bitmask
+    name_offsets  uint64[n + 1], byte offsets into the name blob
+    names         utf-8 name blob
+
+Every column starts on an 8 byte boundary. MappedRoster mmaps the file and
+exposes the columns as zero-copy NumPy views, so opening a large roster costs
+no parsing, and worker processes reading the same file share its pages.
+
+    python binroster.py employees.txt employees.rdb
+"""
+
+import mmap
+import struct
+import sys
+from typing import List, Optional
+
+import numpy as np
+
+import employee
+import roster
+
+VERSION = 1
+
+FLAG_BAR = 1
+FLAG_OPENING = 2
+FLAG_CLOSING = 4
+
+# magic, version, shift count, employee count, then the offset of each column
+_HEADER = struct.Struct('<8sIIQ6Q')
+
+
+def _align(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def write_packed(packed: roster.PackedRoster, out_path: str) -> None:
+    """Write a PackedRoster in the binary format"""
+    count = len(packed)
+    if any(shift_count > 64 for shift_count in packed.shift_counts):
+        raise roster.RosterFormatError("Binary rosters hold at most 64 availability slots")
+    shift_count = max(packed.shift_counts, default=0)
+
+    encoded = [name.encode('utf-8') for name in packed.names]
+    name_offsets = np.zeros(count + 1, dtype='<u8')
+    np.cumsum([len(name) for name in encoded], out=name_offsets[1:])
+    flags = (np.array(packed.bar, dtype=np.uint8) * FLAG_BAR
+             | np.array(packed.opening, dtype=np.uint8) * FLAG_OPENING
+             | np.array(packed.closing, dtype=np.uint8) * FLAG_CLOSING).astype('<u1')
+
+    columns = [
+        np.array(packed.min_hours, dtype='<i4'),
+        np.array(packed.experience, dtype='<f8'),
+        flags,
+        np.array(packed.availability, dtype='<u8'),
+        name_offsets,
+        np.frombuffer(b''.join(encoded), dtype=np.uint8),
+    ]
+
+    offsets = []
+    position = _align(_HEADER.size)
+    for column in columns:
+        offsets.append(position)
+        position = _align(position + column.nbytes)
+
+    with open(out_path, 'wb') as file:
+        file.write(_HEADER.pack(roster.BINARY_MAGIC, VERSION, shift_count, count, *offsets))
+        for offset, column in zip(offsets, columns):
+            file.write(b'\0' * (offset - file.tell()))
+            file.write(column.tobytes())
+
+
+def convert(csv_path: str, out_path: str,
+            errors: Optional[List[roster.RowError]] = None) -> int:
+    """
+    Convert a roster CSV to the binary format
+
+    Args:
+        csv_path: Roster CSV, streamed in chunks
+        out_path: Binary roster to write
+        errors: If given, invalid rows are skipped and recorded here
+
+    Returns:
+        Number of employees written
+    """
+    packed = roster.load_packed(csv_path, errors=errors)
+    write_packed(packed, out_path)
+    return len(packed)
+
+
+class MappedRoster:
+    """Read-only, memory-mapped binary roster"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as file:
+            self._mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if len(self._mmap) < _HEADER.size:
+            self._mmap.close()
+            raise roster.RosterFormatError(f"{path} is too small to be a binary roster")
+        magic, version, self.shift_count, count, *offsets = _HEADER.unpack_from(self._mmap)
+        if magic != roster.BINARY_MAGIC or version != VERSION:
+            self._mmap.close()
+            raise roster.RosterFormatError(f"{path} is not a version {VERSION} binary roster")
+
+        min_hours, experience, flags, availability, name_offsets, names = offsets
+        self.count = count
+        self.min_hours = np.frombuffer(self._mmap, dtype='<i4', count=count, offset=min_hours)
+        self.experience = np.frombuffer(self._mmap, dtype='<f8', count=count, offset=experience)
+        self.flags = np.frombuffer(self._mmap, dtype='<u1', count=count, offset=flags)
+        self.availability = np.frombuffer(self._mmap, dtype='<u8', count=count, offset=availability)
+        self.name_offsets = np.frombuffer(self._mmap, dtype='<u8', count=count + 1, offset=name_offsets)
+        self._names_start = names
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __enter__(self) -> "MappedRoster":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    @property
+    def bar(self) -> np.ndarray:
+        return (self.flags & FLAG_BAR).astype(bool)
+
+    @property
+    def opening(self) -> np.ndarray:
+        return (self.flags & FLAG_OPENING).astype(bool)
+
+    @property
+    def closing(self) -> np.ndarray:
+        return (self.flags & FLAG_CLOSING).astype(bool)
+
+    def name(self, row: int) -> str:
+        start = self._names_start + int(self.name_offsets[row])
+        end = self._names_start + int(self.name_offsets[row + 1])
+        return self._mmap[start:end].decode('utf-8')
+
+    def names(self) -> List[str]:
+        blob = self._mmap[self._names_start:self._names_start + int(self.name_offsets[-1])]
+        bounds = self.name_offsets.tolist()
+        return [blob[start:end].decode('utf-8') for start, end in zip(bounds, bounds[1:])]
+
+    def to_packed(self) -> roster.PackedRoster:
+        """Copy the columns out into a PackedRoster"""
+        return roster.PackedRoster(
+            names=tuple(self.names()),
+            min_hours=tuple(self.min_hours.tolist()),
+            bar=tuple(self.bar.tolist()),
+            experience=tuple(self.experience.tolist()),
+            opening=tuple(self.opening.tolist()),
+            closing=tuple(self.closing.tolist()),
+            availability=tuple(self.availability.tolist()),
+            shift_counts=(self.shift_count,) * self.count,
+        )
+
+    def to_employees(self) -> List[employee.Employee]:
+        return roster.unpack_employees(self.to_packed())
+
+    def close(self) -> None:
+        """
+        Unmap the file
+
+        Columns still held elsewhere (e.g. a PackedRoster built from this one)
+        keep the mapping alive: it is then unmapped once the last of them is
+        gone rather than here. The roster itself can't be used afterwards.
+        """
+        if self._mmap is None:
+            return
+        self.min_hours = self.experience = self.flags = None
+        self.availability = self.name_offsets = None
+        mapping, self._mmap = self._mmap, None
+        try:
+            mapping.close()
+        except BufferError:
+            # Exported views remain, the mmap closes itself when they're released
+            pass
+
+
+def load(path: str) -> MappedRoster:
+    """Memory-map a binary roster"""
+    return MappedRoster(path)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("usage: python binroster.py <employees.txt> <roster.rdb>")
+        sys.exit(2)
+    skipped: List[roster.RowError] = []
+    written = convert(sys.argv[1], sys.argv[2], errors=skipped)
+    for error in skipped:
+        print(f"Skipped line {error.line}: {error.message}")
+    print(f"Wrote {written} employees to {sys.argv[2]}")
@@ -0,0 +1,53 @@
+"""
+Lightweight command line entry point.
+
+Prints one week's schedule for a roster and imports as little as possible on
+the way: no Flask, no NumPy, no profilers and no logging setup. Only the
+modules the default python engine needs are loaded, so a small roster starts
+and finishes close to bare interpreter startup.
+
+    python cli.py [roster.txt]
+
+IMPORT_BUDGET_MS is what importing this module may cost, as measured by
+``python bench.py --startup`` with ``-X importtime`` (best of several fresh
+interpreters). That command exits non-zero when the import goes over it.
+"""
+
+import sys
+
+import system
+
+# Cumulative -X importtime cost of `import cli`, in milliseconds. Measured at
+# 35-55ms, the rest is headroom for slower machines
+IMPORT_BUDGET_MS = 80
+
+
+def main(argv=None) -> int:
+    """
+    Args:
+        argv: Command line arguments, sys.argv[1:] if not given
+
+    Returns:
+        Exit status
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) > 1 or argv[:1] in (['-h'], ['--help']):
+        print("usage: cli.py [roster.txt]", file=sys.stderr)
+        return 2
+
+    try:
+        scheduler = system.EmployeeScheduler(argv[0] if argv else None)
+        schedule = scheduler.calculate_shifts()
+    except system.EmployeeSchedulerError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    system._print_schedule({
+        day: {shift: [emp.get_name() for emp in emps] for shift, emps in shifts.items()}
+        for day, shifts in schedule.items()
+    }, scheduler.shift_requirements)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
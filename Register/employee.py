@@ -1,3 +1,18 @@
+import warnings
+
+# Hours credited for a single shift
+SHIFT_HOURS = 4
+
+
+def pack_availability(availability: list) -> int:
+    """Pack a list of per-shift booleans into an int, bit i set for shift i"""
+    mask = 0
+    for index, available in enumerate(availability):
+        if available:
+            mask |= 1 << index
+    return mask
+
+
 class Employee:
     """
     Employee class representing staff members with various attributes and weightings.
@@ -10,7 +25,18 @@ class Employee:
         opening (bool): Whether employee can work opening shifts
         closing (bool): Whether employee can work closing shifts
         availability (list): List of shift availability (True/False for each shift)
+
+    Availability is stored as an int bitmask (bit ``day * 2 + shift`` set when
+    available) and there is no per-instance __dict__, which keeps large rosters
+    small in memory.
+
+    Scheduling runs keep worked hours in their own state. The hours here are a
+    copy EmployeeScheduler writes back after its own runs, for the deprecated
+    get_worked_hours, add_shift and set_hours.
     """
+
+    __slots__ = ('_name', '_min_hours', '_bar', '_experience', '_opening', '_closing',
+                 '_availability', '_shift_count', '_worked_hours', '_weighting')
     
     def __init__(self, name: str, min_hours: int, bar: bool, experience: float,
                  opening: bool, closing: bool, availability: list):
@@ -20,27 +46,56 @@ class Employee:
         self._experience: float = experience
         self._opening: bool = opening
         self._closing: bool = closing
-        self._availability: list = availability
+        self._availability: int = pack_availability(availability)
+        self._shift_count: int = len(availability)
         self._worked_hours: int = 0
         self._weighting: float = self._calculate_weighting()
 
-    def is_available(self, day: int, shift: int) -> bool:
+    @classmethod
+    def from_mask(cls, name: str, min_hours: int, bar: bool, experience: float,
+                  opening: bool, closing: bool, availability_mask: int,
+                  shift_count: int) -> "Employee":
+        """Create an employee from an already packed availability bitmask"""
+        emp = cls(name, min_hours, bar, experience, opening, closing, [])
+        emp._availability = availability_mask
+        emp._shift_count = shift_count
+        return emp
+
+    def is_available(self, day: int, shift: int, shifts_per_day: int = 2,
+                     days_per_week: int = 7) -> bool:
         """
         Check if employee is available for a specific day and shift.
+
+        Availability is a weekly pattern, days past the first week map back
+        onto it.
         
         Args:
-            day (int): Day of the week (0-6)
+            day (int): Day of the planning horizon (0-6 for a single week)
             shift (int): Shift number (0-1 for morning/evening)
+            shifts_per_day (int): Shifts in each day of the availability pattern
+            days_per_week (int): Days in the availability pattern
             
         Returns:
             bool: True if employee is available, False otherwise
         """
-        index = day * 2 + shift
-        return index < len(self._availability) and self._availability[index]
-
-    def add_shift(self) -> None:
-        """Add a shift to the employee's worked hours (typically 4 hours per shift)"""
-        self._worked_hours += 4
+        index = (day % days_per_week) * shifts_per_day + shift
+        return bool(self._availability >> index & 1)
+
+    def fresh_copy(self) -> "Employee":
+        """Return a copy of this employee, weighting changes to it don't touch the original"""
+        # Attribute by attribute, a loop over __slots__ is several times slower
+        clone = Employee.__new__(Employee)
+        clone._name = self._name
+        clone._min_hours = self._min_hours
+        clone._bar = self._bar
+        clone._experience = self._experience
+        clone._opening = self._opening
+        clone._closing = self._closing
+        clone._availability = self._availability
+        clone._shift_count = self._shift_count
+        clone._worked_hours = 0
+        clone._weighting = self._weighting
+        return clone
 
     # Getters
     def get_name(self) -> str:
@@ -53,8 +108,14 @@ class Employee:
         return self._bar
 
     def get_availability(self) -> list:
+        return [bool(self._availability >> index & 1) for index in range(self._shift_count)]
+
+    def get_availability_mask(self) -> int:
         return self._availability
 
+    def get_shift_count(self) -> int:
+        return self._shift_count
+
     def get_experience(self) -> float:
         return self._experience
 
@@ -65,16 +126,34 @@ class Employee:
         return self._closing
 
     def get_worked_hours(self) -> int:
+        """Deprecated, use EmployeeScheduler.worked_hours() or RunResult.worked_hours"""
+        warnings.warn("Employee.get_worked_hours() is deprecated, use EmployeeScheduler.worked_hours()",
+                      DeprecationWarning, stacklevel=2)
         return self._worked_hours
 
     def get_weighting(self) -> float:
         return self._weighting
 
     # Setters
+    def add_shift(self) -> None:
+        """Deprecated, runs count worked hours themselves"""
+        warnings.warn("Employee.add_shift() is deprecated, scheduling runs count worked hours themselves",
+                      DeprecationWarning, stacklevel=2)
+        self._worked_hours += SHIFT_HOURS
+
     def set_hours(self, hours: int) -> None:
-        """Set the number of hours worked"""
+        """Deprecated, runs count worked hours themselves"""
+        warnings.warn("Employee.set_hours() is deprecated, scheduling runs count worked hours themselves",
+                      DeprecationWarning, stacklevel=2)
         self._worked_hours = hours
 
+    def set_experience(self, experience: float) -> None:
+        self._experience = experience
+
+    def set_weighting(self, weighting: float) -> None:
+        """Replace the weighting, e.g. with one from a weighting.WeightingPolicy"""
+        self._weighting = weighting
+
     def _calculate_weighting(self) -> float:
         """
         Calculate the weighting for an employee based on their attributes.
@@ -130,7 +209,7 @@ class Employee:
         """Return a user-friendly string representation"""
         return (f"Employee: {self.get_name()} "
                 f"(Weighting: {self.get_weighting():.2f}, "
-                f"Hours: {self.get_worked_hours()}/{self.get_min_hours()})")
+                f"Hours: {self._worked_hours}/{self.get_min_hours()})")
 
     def __repr__(self) -> str:
         """Return a detailed string representation for debugging"""
@@ -141,7 +220,7 @@ class Employee:
             f"experience={self._experience}, "
             f"opening={self._opening}, "
             f"closing={self._closing}, "
-            f"availability={self._availability})"
+            f"availability={self.get_availability()})"
         )
 
 
@@ -169,11 +248,3 @@ if __name__ == "__main__":
     print(f"\nTesting availability for {test_emp.get_name()}:")
     print(f"Monday morning (0,0): {test_emp.is_available(0, 0)}")
     print(f"Wednesday evening (2,1): {test_emp.is_available(2, 1)}")
-    
-    # Test hour tracking
-    print(f"\nTesting hour tracking for {test_emp.get_name()}:")
-    print(f"Initial hours: {test_emp.get_worked_hours()}")
-    test_emp.add_shift()
-    print(f"After one shift: {test_emp.get_worked_hours()}")
-    test_emp.add_shift()
-    print(f"After two shifts: {test_emp.get_worked_hours()}")
\ No newline at end of file
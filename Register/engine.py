@@ -0,0 +1,191 @@
+"""
+Vectorized scheduling engine.
+
+Availability is packed into an (employees x slots) NumPy bool matrix and the
+per-employee values the greedy assigner reads (skills, min_hours, weighting)
+are kept as flat arrays. Filtering, requirement checks and top-k selection for
+a slot are then whole-array operations instead of a Python loop over every
+Employee.
+
+The matrix is only read once built. Worked hours belong to a run and are
+passed in as an array from hours(), so concurrent runs can share one matrix.
+
+The engine reproduces EmployeeScheduler's greedy output exactly: candidates are
+ranked by (min_hours - worked_hours, weighting) descending, with ties kept in
+roster order just like the stable list.sort in _assign_shift.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import employee
+import ordering
+
+
+class AvailabilityMatrix:
+    """Columnar view of a roster used by the vectorized assigner"""
+
+    def __init__(self, employees: List[employee.Employee], columns=None, rows: Optional[Sequence[int]] = None):
+        """
+        Args:
+            employees: Roster already in weighting order
+            columns: binroster.MappedRoster the employees were loaded from, to
+                take availability, skills and min_hours from its column views
+                instead of reading every Employee
+            rows: Row of each employee in columns
+        """
+        n = len(employees)
+        self.employees = employees
+
+        if columns is not None:
+            rows = np.asarray(rows, dtype=np.intp)
+            masks = columns.availability[rows]
+            self.bar = columns.bar[rows]
+            self.opening = columns.opening[rows]
+            self.closing = columns.closing[rows]
+            self.min_hours = columns.min_hours[rows].astype(np.int64)
+        else:
+            masks = np.fromiter((emp.get_availability_mask() for emp in employees), dtype=np.uint64, count=n)
+            self.bar = np.fromiter((emp.get_bar() for emp in employees), dtype=bool, count=n)
+            self.opening = np.fromiter((emp.get_opening() for emp in employees), dtype=bool, count=n)
+            self.closing = np.fromiter((emp.get_closing() for emp in employees), dtype=bool, count=n)
+            self.min_hours = np.fromiter((emp.get_min_hours() for emp in employees), dtype=np.int64, count=n)
+
+        # Unpack the per-employee availability bitmasks into matrix columns
+        slots = int(masks.max()).bit_length() if n else 0
+        self.available = ((masks[:, None] >> np.arange(slots, dtype=np.uint64)) & np.uint64(1)).astype(bool)
+
+        self.weighting = np.fromiter((emp.get_weighting() for emp in employees), dtype=np.float64, count=n)
+        self.skills: Dict[str, np.ndarray] = {'bar': self.bar, 'opening': self.opening, 'closing': self.closing}
+
+        # Position of each row when ordered by weighting (descending), ties in
+        # roster order. Combined with the hours deficit this gives every row a
+        # unique integer priority, so argpartition picks exactly the rows a
+        # stable sort would.
+        order = np.argsort(-self.weighting, kind='stable')
+        self._rank = np.empty(n, dtype=np.int64)
+        self._rank[order] = np.arange(n, dtype=np.int64)
+
+        self.positions: Dict[int, int] = {id(emp): row for row, emp in enumerate(employees)}
+        self.names: Dict[str, int] = {emp.get_name(): row for row, emp in enumerate(employees)}
+
+    def __len__(self) -> int:
+        return len(self.employees)
+
+    def hours(self, worked_hours: Optional[Sequence[int]] = None) -> np.ndarray:
+        """A run's worked hours array, by row, all zero if not given"""
+        if worked_hours is None:
+            return np.zeros(len(self), dtype=np.int64)
+        return np.asarray(worked_hours, dtype=np.int64).copy()
+
+    def candidates(self, index: int, worked_hours: np.ndarray,
+                   overrides: Optional[Dict[str, bool]] = None) -> np.ndarray:
+        """
+        Rows available for a slot that are still under their minimum hours
+
+        Args:
+            index: Slot index into the weekly availability
+            worked_hours: The run's worked hours, from hours()
+            overrides: Availability by employee name that replaces the matrix for this slot
+        """
+        if index < self.available.shape[1]:
+            available = self.available[:, index]
+        else:
+            available = np.zeros(len(self), dtype=bool)
+        if overrides:
+            available = available.copy()
+            for name, value in overrides.items():
+                # Names not on the roster are ignored, as in ordering.CandidateIndex
+                row = self.names.get(name)
+                if row is not None:
+                    available[row] = value
+        return np.flatnonzero(available & (worked_hours < self.min_hours))
+
+    def select(self, index: int, worked_hours: np.ndarray, min_employees: int, pool: Sequence[Tuple[str, int]] = (),
+               quotas: Sequence[Tuple[str, int]] = (), blocked: int = 0,
+               overrides: Optional[Dict[str, bool]] = None) -> Tuple[Optional[np.ndarray], int]:
+        """
+        Pick the rows to assign to a slot
+
+        Args:
+            index: Slot index into the weekly availability
+            worked_hours: The run's worked hours, from hours()
+            min_employees: Number of employees the slot needs
+            pool: (skill, count) pairs, the candidates must include that many
+                employees with the skill
+            quotas: (skill, count) pairs the selected rows themselves must meet
+            blocked: Bitset of rows that may not work this slot, see rules.RuleSet.blocked
+            overrides: Availability by employee name that replaces the matrix for this slot
+
+        Returns:
+            (selected rows in priority order or None if requirements can't be
+            met, number of candidates)
+        """
+        rows = self.candidates(index, worked_hours, overrides)
+        if blocked:
+            rows = rows[~self._unpack(blocked)[rows]]
+        candidates = rows.size
+        if rows.size < min_employees:
+            return None, candidates
+        for skill, count in tuple(pool) + tuple(quotas):
+            if np.count_nonzero(self.skills[skill][rows]) < count:
+                return None, candidates
+        if min_employees <= 0:
+            return rows[:0], candidates
+
+        # Smaller key == higher priority: biggest deficit first, then rank
+        key = (worked_hours[rows] - self.min_hours[rows]) * len(self) + self._rank[rows]
+        if quotas:
+            chosen = np.zeros(rows.size, dtype=bool)
+            for skill, count in quotas:
+                has = self.skills[skill][rows]
+                missing = count - np.count_nonzero(has & chosen)
+                if missing <= 0:
+                    continue
+                options = np.flatnonzero(has & ~chosen)
+                chosen[options[np.argsort(key[options])[:missing]]] = True
+            missing = min_employees - np.count_nonzero(chosen)
+            if missing < 0:
+                # Same fallback as ordering.DeficitQueue.select
+                chosen = self._cover(rows, key, min_employees, quotas)
+                if chosen is None:
+                    return None, candidates
+                missing = min_employees - np.count_nonzero(chosen)
+            rest = np.flatnonzero(~chosen)
+            chosen[rest[np.argsort(key[rest])[:missing]]] = True
+            rows, key = rows[chosen], key[chosen]
+        elif min_employees < rows.size:
+            top = np.argpartition(key, min_employees - 1)[:min_employees]
+            rows, key = rows[top], key[top]
+        return rows[np.argsort(key)], candidates
+
+    def _cover(self, rows: np.ndarray, key: np.ndarray, min_employees: int,
+               quotas: Sequence[Tuple[str, int]]) -> Optional[np.ndarray]:
+        """Mask over rows of the smallest team meeting every quota, see ordering.cover_quotas"""
+        minimums = [count for _, count in quotas]
+        has = [self.skills[skill][rows] for skill, _ in quotas]
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        for signature in range(1, 1 << len(quotas)):
+            members = np.ones(rows.size, dtype=bool)
+            for bit, skill in enumerate(has):
+                members &= skill if signature >> bit & 1 else ~skill
+            options = np.flatnonzero(members)
+            useful = max(minimums[bit] for bit in range(len(quotas)) if signature >> bit & 1)
+            top = options[np.argsort(key[options])[:useful]]
+            if top.size:
+                groups[signature] = list(zip(key[top].tolist(), top.tolist()))
+        cover = ordering.cover_quotas(groups, minimums, min_employees)
+        if cover is None:
+            return None
+        chosen = np.zeros(rows.size, dtype=bool)
+        chosen[cover] = True
+        return chosen
+
+    def _unpack(self, bits: int) -> np.ndarray:
+        """Bool row mask from a bitset over rows"""
+        data = np.frombuffer(bits.to_bytes((len(self) + 7) // 8, 'little'), dtype=np.uint8)
+        return np.unpackbits(data, bitorder='little')[:len(self)].astype(bool)
+
+    def to_employees(self, rows: np.ndarray) -> List[employee.Employee]:
+        return [self.employees[row] for row in rows.tolist()]
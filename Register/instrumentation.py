@@ -0,0 +1,180 @@
+"""
+Scheduler instrumentation.
+
+Every EmployeeScheduler run fills a SchedulerStats: per-phase timers, and for
+each slot its time, candidate count and number assigned, plus the number of
+slots that failed requirement validation. Finished runs are folded into the
+process-wide `metrics` registry that app.py serves at /metrics.
+
+profile() is an opt-in cProfile / tracemalloc hook for a single block of code,
+e.g. one request.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterator, Optional, Tuple
+
+PROFILERS = ('cprofile', 'tracemalloc')
+
+
+@dataclass
+class SlotStats:
+    """Timing and sizes for one (day, shift) slot"""
+    day: int
+    shift: int
+    seconds: float = 0.0
+    candidates: int = 0
+    assigned: int = 0
+
+
+@dataclass
+class SchedulerStats:
+    """Measurements from a single scheduler run"""
+    phases: Dict[str, float] = field(default_factory=dict)
+    slots: Dict[Tuple[int, int], SlotStats] = field(default_factory=dict)
+    validation_failures: int = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a block and add it to the named phase"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def reset(self, keep: Tuple[str, ...] = ()) -> None:
+        """Clear everything except the named phases"""
+        self.phases = {name: seconds for name, seconds in self.phases.items() if name in keep}
+        self.slots = {}
+        self.validation_failures = 0
+
+    def _slot(self, day: int, shift: int) -> SlotStats:
+        slot = self.slots.get((day, shift))
+        if slot is None:
+            slot = self.slots[(day, shift)] = SlotStats(day, shift)
+        return slot
+
+    def count_candidates(self, day: int, shift: int, candidates: int) -> None:
+        self._slot(day, shift).candidates = candidates
+
+    def record_slot(self, day: int, shift: int, seconds: float, assigned: int) -> None:
+        slot = self._slot(day, shift)
+        slot.seconds += seconds
+        slot.assigned = assigned
+
+    def slowest_slot(self) -> Optional[SlotStats]:
+        return max(self.slots.values(), key=lambda slot: slot.seconds, default=None)
+
+    def to_dict(self) -> Dict:
+        return {
+            'phases': dict(self.phases),
+            'slots': [asdict(slot) for slot in self.slots.values()],
+            'validation_failures': self.validation_failures,
+        }
+
+
+class MetricsRegistry:
+    """Totals across every scheduler run in this process"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clear()
+
+    def _clear(self) -> None:
+        self.runs = 0
+        self.validation_failures = 0
+        self.phase_seconds: Dict[str, float] = {}
+        self.slot_seconds: Dict[Tuple[int, int], float] = {}
+        self.last_run: Optional[Dict] = None
+        self.last_profile: Optional[str] = None
+
+    def record(self, stats: SchedulerStats) -> None:
+        with self._lock:
+            self.runs += 1
+            self.validation_failures += stats.validation_failures
+            for name, seconds in stats.phases.items():
+                self.phase_seconds[name] = self.phase_seconds.get(name, 0.0) + seconds
+            for key, slot in stats.slots.items():
+                self.slot_seconds[key] = self.slot_seconds.get(key, 0.0) + slot.seconds
+            self.last_run = stats.to_dict()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'runs': self.runs,
+                'validation_failures': self.validation_failures,
+                'phase_seconds': dict(self.phase_seconds),
+                'slot_seconds': [
+                    {'day': day, 'shift': shift, 'seconds': seconds}
+                    for (day, shift), seconds in sorted(self.slot_seconds.items())
+                ],
+                'last_run': self.last_run,
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._clear()
+
+
+metrics = MetricsRegistry()
+
+
+class ProfileReport:
+    """Filled in with the profiler output when the profile() block exits"""
+
+    def __init__(self, kind: str):
+        self.kind = kind
+        self.text = ''
+
+
+@contextmanager
+def profile(kind: str, limit: int = 25) -> Iterator[ProfileReport]:
+    """
+    Profile a block of code
+
+    Args:
+        kind: 'cprofile' for the top functions by cumulative time, or
+            'tracemalloc' for the top allocation sites
+        limit: Number of entries in the report
+
+    Yields:
+        ProfileReport whose text is set once the block finishes
+    """
+    if kind not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{kind}', expected one of: {', '.join(PROFILERS)}")
+    report = ProfileReport(kind)
+
+    # Profilers are only imported when a profile is asked for
+    if kind == 'cprofile':
+        import cProfile
+        import io
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield report
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            report.text = out.getvalue()
+        return
+
+    import tracemalloc
+    # tracemalloc is process-wide, don't stop it if someone else started it
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    try:
+        yield report
+    finally:
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        if started:
+            tracemalloc.stop()
+        lines = [f"Peak traced memory: {peak / 1024:.1f} KiB"]
+        lines.extend(str(stat) for stat in snapshot.statistics('lineno')[:limit])
+        report.text = '\n'.join(lines)
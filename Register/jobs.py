@@ -0,0 +1,160 @@
+"""
+Background job queue for schedule generation.
+
+Jobs run on a bounded thread pool so a slow solve never ties up a web worker.
+Submitting a job whose key matches one that is still queued or running returns
+the existing job instead of starting a second identical solve. Each job keeps
+a list of progress events that pollers or streaming clients can wait on.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+# Progress callback handed to job functions: progress(event_dict)
+Progress = Callable[[Dict[str, Any]], None]
+
+
+class JobQueueFull(Exception):
+    """Raised when too many jobs are already waiting"""
+    pass
+
+
+class Job:
+    """A submitted job, its progress events and eventually its result"""
+
+    def __init__(self, key: Hashable):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.events: List[Dict[str, Any]] = []
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self._changed = threading.Condition()
+
+    @property
+    def in_flight(self) -> bool:
+        return self.status in (QUEUED, RUNNING)
+
+    def add_event(self, event: Dict[str, Any]) -> None:
+        with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    def _set_status(self, status: str, result: Any = None, error: Optional[str] = None) -> None:
+        with self._changed:
+            self.status = status
+            if status == RUNNING:
+                self.started = time.time()
+            elif status in (DONE, FAILED):
+                self.finished = time.time()
+                self.result = result
+                self.error = error
+            self._changed.notify_all()
+
+    def wait_events(self, since: int, timeout: float) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Wait for events after the first `since` ones
+
+        Returns:
+            (new events, whether the job has finished)
+        """
+        with self._changed:
+            self._changed.wait_for(lambda: len(self.events) > since or not self.in_flight, timeout)
+            return self.events[since:], not self.in_flight
+
+    def to_dict(self, include_result: bool = True) -> Dict[str, Any]:
+        with self._changed:
+            data = {
+                'id': self.id,
+                'status': self.status,
+                'progress': len(self.events),
+                'created': self.created,
+                'started': self.started,
+                'finished': self.finished,
+            }
+            if self.error is not None:
+                data['error'] = self.error
+            if include_result and self.status == DONE:
+                data['result'] = self.result
+            return data
+
+
+class JobQueue:
+    """Bounded background pool with de-duplication of identical in-flight jobs"""
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, max_finished: int = 256):
+        """
+        Args:
+            max_workers: Jobs that can run at the same time
+            max_pending: Jobs that can be queued or running before submit() refuses more
+            max_finished: Finished jobs kept around for polling, oldest dropped first
+        """
+        self.max_pending = max_pending
+        self.max_finished = max_finished
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='schedule-job')
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Job] = {}
+
+    def submit(self, key: Hashable, fn: Callable[[Progress], Any]) -> Tuple[Job, bool]:
+        """
+        Queue fn(progress) unless an identical job is already in flight
+
+        Args:
+            key: Jobs with equal keys produce the same result
+            fn: Called on a worker thread with a progress callback, returns the result
+
+        Returns:
+            (job, whether it is a new job rather than an existing in-flight one)
+
+        Raises:
+            JobQueueFull: max_pending jobs are already queued or running
+        """
+        with self._lock:
+            existing = self._in_flight.get(key)
+            if existing is not None:
+                return existing, False
+            if len(self._in_flight) >= self.max_pending:
+                raise JobQueueFull(f"{len(self._in_flight)} jobs already pending")
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._in_flight[key] = job
+            self._prune()
+        self._pool.submit(self._run, job, fn)
+        return job, True
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    def _run(self, job: Job, fn: Callable[[Progress], Any]) -> None:
+        job._set_status(RUNNING)
+        try:
+            result = fn(job.add_event)
+        except Exception as e:
+            job._set_status(FAILED, error=str(e))
+        else:
+            job._set_status(DONE, result=result)
+        finally:
+            with self._lock:
+                if self._in_flight.get(job.key) is job:
+                    del self._in_flight[job.key]
+
+    def _prune(self) -> None:
+        """Drop the oldest finished jobs beyond max_finished, lock must be held"""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.in_flight]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
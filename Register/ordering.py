@@ -0,0 +1,364 @@
+"""
+Scheduling order and candidate index for the greedy assigner.
+
+The roster is ordered once per run by weighting, and every employee's
+position in that order is used as the tie-breaker for the rest of the run.
+
+Every set of employees the assigner needs is an int bitset over those
+positions:
+
+* CandidateIndex: one availability set per weekly slot and one set per skill
+  (bar, opening, closing), built once from the roster and only read after
+  that, so any number of runs can share it
+* DeficitQueue: one run's employees still under their minimum hours,
+  bucketed by hours deficit (min_hours - worked_hours)
+
+A slot's candidates are its availability set ANDed with the active
+employees. Requirement checks are a popcount and a few ANDs. Selection walks
+the deficit buckets from the largest down and takes the lowest positions
+first, which is the (deficit, weighting) priority order. Recording a shift
+moves one bit between buckets, and an employee who reaches min_hours drops
+out of every set, so nothing ever scans the full roster per slot.
+"""
+
+from bisect import insort
+from operator import attrgetter
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import employee
+
+def weighting_order(employees: List[employee.Employee]) -> List[employee.Employee]:
+    """
+    Order employees by weighting, highest first
+
+    Employees with equal weighting come out in reverse roster order, matching
+    the merge sort this replaces (its merge step took from the right half on
+    ties).
+
+    Complexity:
+        O(n log n), weightings are read once per employee
+    """
+    return sorted(employees, key=attrgetter('_weighting'))[::-1]
+
+
+def weighting_positions(weights: Sequence[float]) -> List[int]:
+    """Roster positions in the order weighting_order puts employees with these weights"""
+    # Equal weights in reverse roster order, as in weighting_order
+    return sorted(range(len(weights)), key=lambda position: (-weights[position], -position))
+
+
+def reorder(order: List[int], changed: Sequence[int], weights: Sequence[float]) -> List[int]:
+    """
+    Repair a weighting order after some weights changed
+
+    Args:
+        order: Roster positions in weighting_order order, for the old weights
+        changed: Positions whose weight changed
+        weights: Current weight of every position
+
+    Returns:
+        The order weighting_order gives for the current weights. Only the
+        changed positions move, each is re-inserted by bisection, unless so
+        many changed that a full sort is cheaper.
+
+    Complexity:
+        O(n + k log n) comparisons for k changed positions
+    """
+    if len(changed) * 8 > len(order):
+        return weighting_positions(weights)
+
+    moved = set(changed)
+    kept = [position for position in order if position not in moved]
+    for position in changed:
+        insort(kept, position, key=lambda other: (-weights[other], -other))
+    return kept
+
+
+_DIGITS = bytes.maketrans(b'\x00\x01', b'01')
+
+
+def _bitset(flags: List[int]) -> int:
+    """
+    Bitset with bit i set where flags[i] is 1
+
+    Parsed as one base-2 string, which is linear, OR-ing bits into a growing
+    int one at a time is quadratic.
+    """
+    if not flags:
+        return 0
+    return int(bytes(reversed(flags)).translate(_DIGITS), 2)
+
+
+def _array_bitset(flags) -> int:
+    """Bitset with bit i set where the NumPy array flags[i] is non-zero"""
+    import numpy as np
+    return int.from_bytes(np.packbits(flags.astype(bool), bitorder='little').tobytes(), 'little')
+
+
+# Partial teams cover_quotas tries at most, it gives up on a slot after that
+COVER_SEARCH_LIMIT = 4096
+
+
+def cover_quotas(groups: Dict[int, List[Tuple[int, int]]], minimums: Sequence[int],
+                 count: int) -> Optional[List[int]]:
+    """
+    Smallest set of employees that meets every skill quota at once
+
+    The fallback for when taking each quota's best employees one quota at a
+    time needs more than count employees, while a few who hold several of
+    the skills would do.
+
+    Args:
+        groups: Candidates by skill signature (bit i set for the skill of
+            minimums[i]), each a list of (priority key, employee) pairs,
+            highest priority (smallest key) first. Only the first
+            max(minimums) of a group can matter.
+        minimums: Employees each quota needs
+        count: Most employees the set may have
+
+    Returns:
+        The employees of the smallest such set, highest priority first among
+        sets of that size, or None if there is none within count (or within
+        COVER_SEARCH_LIMIT tries)
+
+    Complexity:
+        At most COVER_SEARCH_LIMIT partial teams, each a split of the first
+        few signatures' employees
+    """
+    signatures = sorted(groups, key=lambda signature: -signature.bit_count())
+    best: Optional[Tuple[int, List[int]]] = None
+    best_members: List[int] = []
+    taken = [0] * len(signatures)
+    tries = 0
+
+    def search(depth: int, size: int, needed: Tuple[int, ...]) -> None:
+        nonlocal best, best_members, tries
+        if tries >= COVER_SEARCH_LIMIT or size > count or (best is not None and size > best[0]):
+            return
+        tries += 1
+        if not any(needed):
+            chosen = [pair for signature, take in zip(signatures, taken) for pair in groups[signature][:take]]
+            chosen.sort()
+            keys = [key for key, _ in chosen]
+            if best is None or (size, keys) < best:
+                best, best_members = (size, keys), [member for _, member in chosen]
+            return
+        if depth == len(signatures):
+            return
+        signature = signatures[depth]
+        useful = max(needed[i] for i in range(len(needed)) if signature >> i & 1) if signature else 0
+        for take in range(min(useful, len(groups[signature])), -1, -1):
+            taken[depth] = take
+            search(depth + 1, size + take, tuple(
+                max(0, need - take) if signature >> i & 1 else need for i, need in enumerate(needed)))
+        taken[depth] = 0
+
+    search(0, 0, tuple(minimums))
+    return best_members if best is not None else None
+
+
+def iter_bits(bits: int) -> Iterator[int]:
+    """Positions of the set bits, lowest first"""
+    while bits:
+        low = bits & -bits
+        yield low.bit_length() - 1
+        bits ^= low
+
+
+class CandidateIndex:
+    """Per-slot and per-skill bitsets of a roster, never changed once built"""
+
+    def __init__(self, employees: List[employee.Employee], columns=None, rows: Optional[Sequence[int]] = None):
+        """
+        Args:
+            employees: Roster already in weighting order (see weighting_order)
+            columns: binroster.MappedRoster the employees were loaded from, to
+                build the bitsets from its column views instead of reading
+                every Employee
+            rows: Row of each employee in columns
+        """
+        self.employees = employees
+        self.positions: Dict[int, int] = {id(emp): position for position, emp in enumerate(employees)}
+        self.names: Dict[str, int] = {emp._name: position for position, emp in enumerate(employees)}
+        if columns is not None:
+            self._from_columns(columns, rows)
+            return
+        self.min_hours: List[int] = [emp._min_hours for emp in employees]
+
+        masks = [emp._availability for emp in employees]
+        slot_count = max((mask.bit_length() for mask in masks), default=0)
+        self.slots: List[int] = [_bitset([(mask >> index) & 1 for mask in masks]) for index in range(slot_count)]
+        self.skills: Dict[str, int] = {
+            'bar': _bitset([1 if emp._bar else 0 for emp in employees]),
+            'opening': _bitset([1 if emp._opening else 0 for emp in employees]),
+            'closing': _bitset([1 if emp._closing else 0 for emp in employees]),
+        }
+
+    def _from_columns(self, columns, rows: Sequence[int]) -> None:
+        # NumPy is already loaded with a binary roster
+        import numpy as np
+        rows = np.asarray(rows, dtype=np.intp)
+        self.min_hours = columns.min_hours[rows].tolist()
+        masks = columns.availability[rows]
+        slot_count = int(masks.max()).bit_length() if len(rows) else 0
+        self.slots = [_array_bitset((masks >> np.uint64(index)) & np.uint64(1)) for index in range(slot_count)]
+        self.skills = {
+            'bar': _array_bitset(columns.bar[rows]),
+            'opening': _array_bitset(columns.opening[rows]),
+            'closing': _array_bitset(columns.closing[rows]),
+        }
+
+    def available(self, index: int, overrides: Optional[Dict[str, bool]] = None) -> int:
+        """
+        Bitset of employees available for a slot
+
+        Args:
+            index: Slot index into the weekly availability bitmask
+            overrides: Availability by employee name that replaces the index for this slot
+        """
+        available = self.slots[index] if index < len(self.slots) else 0
+        if overrides:
+            for name, value in overrides.items():
+                position = self.names.get(name)
+                if position is None:
+                    continue
+                bit = 1 << position
+                available = available | bit if value else available & ~bit
+        return available
+
+    def count(self, bits: int) -> int:
+        return bits.bit_count()
+
+    def has_skill(self, bits: int, skill: str) -> bool:
+        return bool(bits & self.skills[skill])
+
+    def to_employees(self, bits: int) -> List[employee.Employee]:
+        return [self.employees[position] for position in iter_bits(bits)]
+
+
+class DeficitQueue:
+    """One run's employees under their minimum hours, bucketed by hours deficit"""
+
+    def __init__(self, index: CandidateIndex, worked_hours: Sequence[int]):
+        """
+        Args:
+            index: Shared index of the roster
+            worked_hours: Hours worked so far by roster position
+        """
+        self.index = index
+        self.reset(worked_hours)
+
+    def reset(self, worked_hours: Sequence[int]) -> None:
+        """Rebuild the buckets from worked hours by roster position"""
+        self._deficits: List[int] = [minimum - worked for minimum, worked in zip(self.index.min_hours, worked_hours)]
+        self._buckets: Dict[int, int] = {
+            deficit: _bitset([1 if value == deficit else 0 for value in self._deficits])
+            for deficit in set(self._deficits) if deficit > 0
+        }
+        self.active = _bitset([1 if deficit > 0 else 0 for deficit in self._deficits])
+
+    def candidates(self, index: int, overrides: Optional[Dict[str, bool]] = None) -> int:
+        """Bitset of employees available for a slot and under their minimum hours"""
+        return self.index.available(index, overrides) & self.active
+
+    def select(self, candidates: int, count: int,
+               quotas: Sequence[Tuple[int, int]] = ()) -> Optional[List[int]]:
+        """
+        Highest priority employees from a candidate bitset
+
+        Priority is (min_hours - worked_hours, weighting) descending, ties in
+        roster order, the same order a stable sort on that key produces.
+
+        Args:
+            candidates: Bitset to choose from
+            count: Employees to choose
+            quotas: (skill bitset, minimum) pairs the chosen employees must
+                meet. The highest priority employees with each skill are
+                taken first, the rest of the team is filled by priority.
+
+        Returns:
+            Roster positions of the chosen employees in priority order, or
+            None if the quotas can't be met within count
+        """
+        if count <= 0:
+            return []
+        if not quotas:
+            return self._by_priority(candidates, count)
+
+        chosen = 0
+        for skill, minimum in quotas:
+            missing = minimum - (chosen & skill).bit_count()
+            if missing <= 0:
+                continue
+            taken = self._by_priority(candidates & skill & ~chosen, missing)
+            if len(taken) < missing:
+                return None
+            for position in taken:
+                chosen |= 1 << position
+        missing = count - chosen.bit_count()
+        if missing < 0:
+            # One quota at a time took too many, employees with several of
+            # the skills may still cover them all within count
+            chosen = self._cover(candidates, count, quotas)
+            if chosen is None:
+                return None
+            missing = count - chosen.bit_count()
+        for position in self._by_priority(candidates & ~chosen, missing):
+            chosen |= 1 << position
+        return self._by_priority(chosen, count)
+
+    def _cover(self, candidates: int, count: int, quotas: Sequence[Tuple[int, int]]) -> Optional[int]:
+        """Bitset of the smallest team meeting every quota, see cover_quotas"""
+        minimums = [minimum for _, minimum in quotas]
+        groups: Dict[int, List[Tuple[int, int]]] = {}
+        for signature in range(1, 1 << len(quotas)):
+            members = candidates
+            for bit, (skill, _) in enumerate(quotas):
+                members &= skill if signature >> bit & 1 else ~skill
+            useful = max(minimums[bit] for bit in range(len(quotas)) if signature >> bit & 1)
+            taken = self._by_priority(members, useful)
+            if taken:
+                # Smaller key is higher priority, as _by_priority orders them
+                groups[signature] = [(-self._deficits[position] * len(self._deficits) + position, position)
+                                     for position in taken]
+        cover = cover_quotas(groups, minimums, count)
+        if cover is None:
+            return None
+        chosen = 0
+        for position in cover:
+            chosen |= 1 << position
+        return chosen
+
+    def _by_priority(self, candidates: int, count: int) -> List[int]:
+        """Positions of up to count candidates, highest priority first"""
+        selected: List[int] = []
+        for deficit in sorted(self._buckets, reverse=True):
+            if len(selected) >= count:
+                break
+            members = self._buckets[deficit] & candidates
+            while members and len(selected) < count:
+                low = members & -members
+                selected.append(low.bit_length() - 1)
+                members ^= low
+        return selected
+
+    def update(self, position: int, worked_hours: int) -> None:
+        """Move an employee to the bucket matching their worked hours"""
+        old = self._deficits[position]
+        new = self.index.min_hours[position] - worked_hours
+        if new == old:
+            return
+        self._deficits[position] = new
+        bit = 1 << position
+
+        if old > 0:
+            remaining = self._buckets[old] & ~bit
+            if remaining:
+                self._buckets[old] = remaining
+            else:
+                del self._buckets[old]
+        if new > 0:
+            self._buckets[new] = self._buckets.get(new, 0) | bit
+            self.active |= bit
+        else:
+            self.active &= ~bit
@@ -0,0 +1,305 @@
+"""
+Employee roster ingestion and caching.
+
+The CSV is read as a stream: the header is resolved once into column indexes
+and rows are parsed in chunks straight into PackedRoster columns, so a large
+export never has to exist as a list of dicts. Bad rows can be collected as
+RowErrors instead of aborting the load.
+
+Parsing employees.txt and building every Employee is the bulk of the work
+behind a /populate request. The process-wide cache keeps one parsed copy of
+each roster file, keyed on its path, and reuses it until the file's mtime or
+size changes. Callers always get fresh Employee copies, so weighting and
+experience changes one scheduler makes to its employees never reach another's.
+"""
+
+import csv
+import os
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import employee
+
+
+class _CacheEntry(NamedTuple):
+    mtime_ns: int
+    size: int
+    employees: Tuple[employee.Employee, ...]
+    # Computed by the first RosterCache.fingerprint call, loads don't need it
+    fingerprint: Optional[str] = None
+
+
+class PackedRoster(NamedTuple):
+    """
+    Column-per-field roster made of plain tuples.
+
+    Much smaller to pickle than a list of Employee objects, used to ship
+    rosters to worker processes.
+    """
+    names: Tuple[str, ...]
+    min_hours: Tuple[int, ...]
+    bar: Tuple[bool, ...]
+    experience: Tuple[float, ...]
+    opening: Tuple[bool, ...]
+    closing: Tuple[bool, ...]
+    availability: Tuple[int, ...]
+    shift_counts: Tuple[int, ...]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+def pack_employees(employees: Iterable[employee.Employee]) -> PackedRoster:
+    """Convert employees to a PackedRoster"""
+    employees = list(employees)
+    return PackedRoster(
+        names=tuple(emp.get_name() for emp in employees),
+        min_hours=tuple(emp.get_min_hours() for emp in employees),
+        bar=tuple(emp.get_bar() for emp in employees),
+        experience=tuple(emp.get_experience() for emp in employees),
+        opening=tuple(emp.get_opening() for emp in employees),
+        closing=tuple(emp.get_closing() for emp in employees),
+        availability=tuple(emp.get_availability_mask() for emp in employees),
+        shift_counts=tuple(emp.get_shift_count() for emp in employees),
+    )
+
+
+def unpack_employees(packed: PackedRoster) -> List[employee.Employee]:
+    """Rebuild Employee objects from a PackedRoster"""
+    return [
+        employee.Employee.from_mask(*fields)
+        for fields in zip(packed.names, packed.min_hours, packed.bar, packed.experience,
+                          packed.opening, packed.closing, packed.availability,
+                          packed.shift_counts)
+    ]
+
+
+# Rows parsed per chunk by iter_roster_chunks
+DEFAULT_CHUNK_SIZE = 10000
+
+REQUIRED_COLUMNS = ('name', 'min_hours', 'bar', 'experience', 'opening', 'closing')
+
+
+# First bytes of a binary roster written by binroster.py
+BINARY_MAGIC = b'RSTRBIN\0'
+
+
+def is_binary_roster(path: str) -> bool:
+    """Check whether path is a binary roster rather than a CSV"""
+    with open(path, 'rb') as file:
+        return file.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+class RosterFormatError(ValueError):
+    """Raised when a roster file has a bad header or, in strict mode, a bad row"""
+    pass
+
+
+class RowError(NamedTuple):
+    """A roster row that was skipped"""
+    line: int
+    message: str
+
+
+class _Columns(NamedTuple):
+    """Column indexes resolved from a roster header"""
+    name: int
+    min_hours: int
+    bar: int
+    experience: int
+    opening: int
+    closing: int
+    availability: Tuple[int, ...]
+    width: int
+
+
+def _resolve_header(header: List[str]) -> _Columns:
+    """Map the header onto column indexes, availability columns in file order"""
+    positions = {column.strip(): index for index, column in enumerate(header)}
+    missing = [column for column in REQUIRED_COLUMNS if column not in positions]
+    if missing:
+        raise RosterFormatError(f"Roster header is missing columns: {', '.join(missing)}")
+    availability = tuple(
+        index for index, column in enumerate(header)
+        if "morning" in column or "evening" in column
+    )
+    return _Columns(*(positions[column] for column in REQUIRED_COLUMNS),
+                    availability=availability, width=len(header))
+
+
+def iter_roster_chunks(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       errors: Optional[List[RowError]] = None) -> Iterator[PackedRoster]:
+    """
+    Parse a roster CSV in chunks
+
+    Args:
+        path: Roster file path
+        chunk_size: Rows per yielded chunk
+        errors: If given, invalid rows are appended here and skipped, otherwise
+            the first invalid row raises RosterFormatError
+
+    Yields:
+        PackedRoster per chunk of valid rows
+    """
+    with open(path, 'r', newline='') as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = _resolve_header(header)
+        shift_count = len(columns.availability)
+
+        chunk = _empty_columns()
+        for row in reader:
+            if not row:
+                continue
+            try:
+                if len(row) < columns.width:
+                    raise ValueError(f"expected {columns.width} columns, got {len(row)}")
+                mask = 0
+                for bit, index in enumerate(columns.availability):
+                    if row[index] == 'Y':
+                        mask |= 1 << bit
+                fields = (row[columns.name], int(row[columns.min_hours]), row[columns.bar] == 'True',
+                          float(row[columns.experience]), row[columns.opening] == 'True',
+                          row[columns.closing] == 'True', mask, shift_count)
+            except ValueError as e:
+                if errors is None:
+                    raise RosterFormatError(f"Invalid employee data on line {reader.line_num}: {e}")
+                errors.append(RowError(reader.line_num, str(e)))
+                continue
+
+            for column, value in zip(chunk, fields):
+                column.append(value)
+            if len(chunk[0]) >= chunk_size:
+                yield PackedRoster(*map(tuple, chunk))
+                chunk = _empty_columns()
+
+        if chunk[0]:
+            yield PackedRoster(*map(tuple, chunk))
+
+
+def load_packed(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                errors: Optional[List[RowError]] = None) -> PackedRoster:
+    """Stream a whole roster CSV into a single PackedRoster"""
+    columns = _empty_columns()
+    for chunk in iter_roster_chunks(path, chunk_size, errors):
+        for column, values in zip(columns, chunk):
+            column.extend(values)
+    return PackedRoster(*map(tuple, columns))
+
+
+def iter_employees(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   errors: Optional[List[RowError]] = None) -> Iterator[employee.Employee]:
+    """Stream Employee objects from a roster CSV"""
+    for chunk in iter_roster_chunks(path, chunk_size, errors):
+        yield from unpack_employees(chunk)
+
+
+def _empty_columns() -> Tuple[list, ...]:
+    return tuple([] for _ in PackedRoster._fields)
+
+
+def fingerprint_digest():
+    """An empty fingerprint_employees hash, for rosters hashed chunk by chunk"""
+    import hashlib
+    return hashlib.sha1()
+
+
+def fingerprint_employees(employees: Iterable[employee.Employee], digest=None) -> str:
+    """
+    Content hash of a parsed roster, independent of the file it came from
+
+    Args:
+        employees: The roster, or its next chunk when digest is given
+        digest: fingerprint_digest() to add the employees to, a new one if not given
+
+    Returns:
+        The fingerprint of everything hashed into digest so far
+    """
+    if digest is None:
+        digest = fingerprint_digest()
+    for emp in employees:
+        digest.update(repr(emp).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def fingerprint_file(path: str) -> str:
+    """Content hash of a roster file's bytes, for formats that need no parse to compare"""
+    import hashlib
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class RosterCache:
+    """Parsed rosters keyed by file path, invalidated when the file changes"""
+
+    def __init__(self):
+        self._entries: Dict[str, _CacheEntry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str,
+            loader: Callable[[str], List[employee.Employee]]) -> List[employee.Employee]:
+        """
+        Return fresh employees for the roster at path
+
+        Args:
+            path: Roster file path
+            loader: Called with path to parse the file when there is no usable entry
+
+        Returns:
+            New Employee objects, copies of the cached parse that the caller may change
+        """
+        return [emp.fresh_copy() for emp in self._entry(path, loader).employees]
+
+    def fingerprint(self, path: str,
+                    loader: Callable[[str], List[employee.Employee]]) -> str:
+        """Content hash of the roster at path, parsing and hashing it only if needed"""
+        entry = self._entry(path, loader)
+        if entry.fingerprint is not None:
+            return entry.fingerprint
+        # A binary roster's bytes are its contents, no need to repr every row
+        fingerprint = fingerprint_file(path) if is_binary_roster(path) else fingerprint_employees(entry.employees)
+        key = os.path.abspath(path)
+        with self._lock:
+            # Unless the file was parsed again in the meantime
+            if self._entries.get(key) is entry:
+                self._entries[key] = entry._replace(fingerprint=fingerprint)
+        return fingerprint
+
+    def _entry(self, path: str,
+               loader: Callable[[str], List[employee.Employee]]) -> _CacheEntry:
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry.mtime_ns != stat.st_mtime_ns or entry.size != stat.st_size:
+            entry = _CacheEntry(stat.st_mtime_ns, stat.st_size, tuple(loader(path)))
+            with self._lock:
+                self._entries[key] = entry
+                self.misses += 1
+        else:
+            with self._lock:
+                self.hits += 1
+        return entry
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drop the entry for path, or every entry if no path is given"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+roster_cache = RosterCache()
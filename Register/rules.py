@@ -0,0 +1,241 @@
+"""
+Declarative shift rules.
+
+Rules describe what a slot's team has to look like and what an employee may
+work, on top of min_employees:
+
+* MinSkill: at least `count` employees with a skill (bar, opening, closing)
+  on some shifts and weekdays
+* MaxConsecutiveShifts: nobody works more than `count` slots in a row
+* RestAfterClosing: whoever closes gets the next `shifts` slots off
+* MaxHours: nobody works more than `hours` in a week
+
+ShiftRequirements' needs_opener, needs_bartender and needs_closer flags are
+themselves MinSkill rules (see requirement_rules), extra rules go in
+ShiftRequirements.rules.
+
+A RuleSet compiles the rules once per run. Skill rules become a tuple of
+(skill, count) per weekly slot, checked against the slot's candidate set with
+a popcount each. Employee rules become bitsets over roster positions: the
+teams of the last few slots and who has hit the hours cap. blocked() combines
+them into one set of employees to drop from a slot's candidates, with a
+handful of ANDs and ORs and no pass over the roster.
+"""
+
+from collections import deque
+from dataclasses import dataclass, fields
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import employee
+
+SKILLS = ('bar', 'opening', 'closing')
+# Scopes of a MinSkill rule: the assigned team must include the employees, or
+# only enough of them must be available for the slot to be staffed at all
+TEAM, POOL = 'team', 'pool'
+
+
+def _tuple(value: Optional[Iterable[int]]) -> Optional[Tuple[int, ...]]:
+    return None if value is None else tuple(int(item) for item in value)
+
+
+@dataclass(frozen=True)
+class MinSkill:
+    """At least count employees with a skill in the slots this applies to"""
+    skill: str
+    count: int = 1
+    # Shifts of the day, negative ones count from the last shift. Every shift if None
+    shifts: Optional[Tuple[int, ...]] = None
+    # Weekdays, every day if None
+    days: Optional[Tuple[int, ...]] = None
+    scope: str = TEAM
+
+    def __post_init__(self):
+        if self.skill not in SKILLS:
+            raise ValueError(f"Unknown skill '{self.skill}', expected one of: {', '.join(SKILLS)}")
+        if self.count < 0:
+            raise ValueError(f"MinSkill count must not be negative, got {self.count}")
+        if self.scope not in (TEAM, POOL):
+            raise ValueError(f"Unknown scope '{self.scope}', expected '{TEAM}' or '{POOL}'")
+        # Lists from JSON are kept as tuples so rules stay hashable
+        object.__setattr__(self, 'shifts', _tuple(self.shifts))
+        object.__setattr__(self, 'days', _tuple(self.days))
+
+
+@dataclass(frozen=True)
+class MaxConsecutiveShifts:
+    """Nobody works more than count slots in a row, across days and weeks"""
+    count: int
+
+    def __post_init__(self):
+        if self.count < 1:
+            raise ValueError(f"MaxConsecutiveShifts count must be at least 1, got {self.count}")
+
+
+@dataclass(frozen=True)
+class RestAfterClosing:
+    """Whoever works the last shift of a day is off for the next shifts slots"""
+    shifts: int = 1
+
+    def __post_init__(self):
+        if self.shifts < 1:
+            raise ValueError(f"RestAfterClosing shifts must be at least 1, got {self.shifts}")
+
+
+@dataclass(frozen=True)
+class MaxHours:
+    """Nobody works more than hours in a week"""
+    hours: int
+
+    def __post_init__(self):
+        if self.hours < 0:
+            raise ValueError(f"MaxHours hours must not be negative, got {self.hours}")
+
+
+RULES = {
+    'min_skill': MinSkill,
+    'max_consecutive_shifts': MaxConsecutiveShifts,
+    'rest_after_closing': RestAfterClosing,
+    'max_hours': MaxHours,
+}
+
+
+def from_dict(data: Dict[str, Any]) -> Any:
+    """
+    Build a rule from JSON-style data, e.g.
+
+        {"rule": "min_skill", "skill": "bar", "count": 2, "shifts": [1]}
+    """
+    data = dict(data)
+    kind = data.pop('rule', None)
+    if kind not in RULES:
+        raise ValueError(f"Unknown rule '{kind}', expected one of: {', '.join(RULES)}")
+    cls = RULES[kind]
+    unknown = set(data) - {f.name for f in fields(cls)}
+    if unknown:
+        raise ValueError(f"Unknown {kind} fields: {', '.join(sorted(unknown))}")
+    return cls(**data)
+
+
+def requirement_rules(requirements) -> Tuple[MinSkill, ...]:
+    """
+    The skill rules behind ShiftRequirements' needs_* flags
+
+    These only require enough candidates with the skill, as the greedy
+    assigner has always checked them. Each flag stands on its own, so the
+    opening shift needs a bartender with needs_bartender even when it needs
+    no opener, as in solver.slot_needs.
+    """
+    found = []
+    if requirements.needs_opener:
+        found.append(MinSkill('opening', shifts=(0,), scope=POOL))
+    if requirements.needs_bartender:
+        found.append(MinSkill('bar', shifts=(0,), scope=POOL))
+    if requirements.needs_closer:
+        found.append(MinSkill('closing', shifts=(-1,), scope=POOL))
+    return tuple(found)
+
+
+class SlotRules(NamedTuple):
+    """Skill minimums for one weekly slot, as (skill, count) pairs"""
+    pool: Tuple[Tuple[str, int], ...]
+    team: Tuple[Tuple[str, int], ...]
+
+
+class RuleSet:
+    """Rules compiled for one run over a roster, plus the state employee rules need"""
+
+    def __init__(self, requirements, size: int):
+        """
+        Args:
+            requirements: ShiftRequirements with the flags and rules to compile
+            size: Roster size, employees are known by roster position
+        """
+        self.requirements = requirements
+        self.size = size
+        shifts_per_day, days_per_week = requirements.shifts_per_day, requirements.days_per_week
+        every = requirement_rules(requirements) + tuple(requirements.rules)
+
+        # Skill minimums per weekly slot, the largest count when rules overlap
+        minimums: List[Dict[Tuple[str, str], int]] = [{} for _ in range(days_per_week * shifts_per_day)]
+        consecutive, rest, cap = [], [], []
+        for rule in every:
+            if isinstance(rule, MinSkill):
+                days = range(days_per_week) if rule.days is None else [day % days_per_week for day in rule.days]
+                shifts = range(shifts_per_day) if rule.shifts is None else [
+                    shift % shifts_per_day for shift in rule.shifts]
+                for day in days:
+                    for shift in shifts:
+                        slot = minimums[day * shifts_per_day + shift]
+                        key = (rule.scope, rule.skill)
+                        slot[key] = max(slot.get(key, 0), rule.count)
+            elif isinstance(rule, MaxConsecutiveShifts):
+                consecutive.append(rule.count)
+            elif isinstance(rule, RestAfterClosing):
+                rest.append(rule.shifts)
+            elif isinstance(rule, MaxHours):
+                cap.append(rule.hours)
+            else:
+                raise ValueError(f"Not a shift rule: {rule!r}")
+
+        self.slots: List[SlotRules] = [
+            SlotRules(
+                pool=tuple((skill, count) for (scope, skill), count in slot.items() if scope == POOL and count),
+                team=tuple((skill, count) for (scope, skill), count in slot.items() if scope == TEAM and count),
+            )
+            for slot in minimums
+        ]
+        self._closing_shift = shifts_per_day - 1
+        self._consecutive = min(consecutive, default=0)
+        self._rest = max(rest, default=0)
+        self._cap: Optional[int] = min(cap, default=None)
+        # Only employee rules need to know who worked which slot
+        self.stateful = bool(self._consecutive or self._rest or self._cap is not None)
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget every recorded slot, as at the start of the horizon"""
+        # (closing shift, team bitset) of the most recent slots
+        self._history: deque = deque(maxlen=max(self._consecutive, self._rest, 1))
+        self.start_week()
+
+    def start_week(self) -> None:
+        """Weekly hours start over"""
+        self._hours: List[int] = [0] * self.size if self._cap is not None else []
+        # Employees one more shift would take over the cap
+        self._capped = 0
+        if self._cap is not None and self._cap < employee.SHIFT_HOURS:
+            self._capped = (1 << self.size) - 1
+
+    def slot(self, day: int, shift: int) -> SlotRules:
+        return self.slots[self.requirements.availability_index(day, shift)]
+
+    def blocked(self) -> int:
+        """Bitset of employees the employee rules keep off the next slot"""
+        if not self.stateful:
+            return 0
+        bits = self._capped
+        history = self._history
+        if self._consecutive and len(history) >= self._consecutive:
+            # Worked every one of the last `consecutive` slots
+            streak = -1
+            for offset in range(1, self._consecutive + 1):
+                streak &= history[-offset][1]
+            bits |= streak
+        for offset in range(1, min(self._rest, len(history)) + 1):
+            closing, team = history[-offset]
+            if closing:
+                bits |= team
+        return bits
+
+    def record(self, shift: int, positions: Iterable[int]) -> None:
+        """Record the roster positions that worked the slot just solved, none included"""
+        if not self.stateful:
+            return
+        bits = 0
+        for position in positions:
+            bits |= 1 << position
+            if self._cap is not None:
+                self._hours[position] += employee.SHIFT_HOURS
+                if self._hours[position] + employee.SHIFT_HOURS > self._cap:
+                    self._capped |= 1 << position
+        self._history.append((shift == self._closing_shift, bits))
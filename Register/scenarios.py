@@ -0,0 +1,250 @@
+"""
+What-if scenarios.
+
+A Scenario is a small set of changes on top of a base roster and base shift
+requirements: a different min_employees for some slots, or employees on or
+off for some slots or whole days. ScenarioRunner loads and sorts the roster
+once, and each scenario only swaps in its own requirements and availability
+overrides. The base is never copied or modified, so hundreds of scenarios
+cost hundreds of solves and nothing more.
+
+evaluate_many runs scenarios one after another, or across a process pool
+where every worker builds its runner once. comparison_table lines the results
+up against the baseline by staffed slots, slots staffed with the skills they
+need and hours shortfall. The greedy assigner only needs the skills among a
+slot's candidates, so a staffed slot can still lack them in its team.
+
+    runner = ScenarioRunner('employees.txt')
+    results = runner.evaluate_many([
+        Scenario('busy saturday').set_min_employees(5, 1, 6),
+        Scenario('jane off tuesday').day_off('Jane', 1),
+    ])
+    for row in comparison_table(results):
+        print(row)
+"""
+
+import dataclasses
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import employee
+import roster
+import rules
+import solver
+import system
+
+logger = logging.getLogger(__name__)
+
+BASELINE = 'baseline'
+
+
+@dataclass
+class Scenario:
+    """Changes to evaluate against the base roster and requirements"""
+    name: str
+    # min_employees by (weekday, shift), on top of the base requirements' overrides
+    min_employees: Dict[Tuple[int, int], int] = field(default_factory=dict)
+    # Availability by (day, shift) of the horizon, {employee name: available}
+    availability: Dict[Tuple[int, int], Dict[str, bool]] = field(default_factory=dict)
+    # Changes to any other ShiftRequirements field, e.g. {'needs_bartender': False}
+    requirements: Dict[str, Any] = field(default_factory=dict)
+
+    def set_min_employees(self, day: int, shift: int, count: int) -> "Scenario":
+        self.min_employees[(day, shift)] = count
+        return self
+
+    def set_available(self, name: str, day: int, shift: int, available: bool) -> "Scenario":
+        self.availability.setdefault((day, shift), {})[name] = available
+        return self
+
+    def day_off(self, name: str, day: int, shifts_per_day: int = 2) -> "Scenario":
+        """Make an employee unavailable for every shift of a day"""
+        for shift in range(shifts_per_day):
+            self.set_available(name, day, shift, False)
+        return self
+
+    def apply(self, base: system.ShiftRequirements) -> system.ShiftRequirements:
+        """Requirements for this scenario, base is left untouched"""
+        requirements = dataclasses.replace(base, **self.requirements)
+        if self.min_employees:
+            requirements.min_employees_overrides = {**base.min_employees_overrides, **self.min_employees}
+        return requirements
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Scenario":
+        """
+        Build a scenario from JSON-style data:
+
+            {"name": "...",
+             "min_employees": [{"day": 5, "shift": 1, "count": 6}],
+             "availability": [{"employee": "Jane", "day": 1, "shift": 0, "available": false}],
+             "days_off": [{"employee": "Jane", "day": 1}],
+             "requirements": {"needs_bartender": false,
+                              "rules": [{"rule": "max_hours", "hours": 24}]}}
+        """
+        scenario = cls(str(data['name']), requirements=dict(data.get('requirements', {})))
+        if 'min_employees_overrides' in scenario.requirements:
+            # JSON keys are strings, not (day, shift) tuples, so they would never match a slot
+            raise ValueError("Set min_employees_overrides with the 'min_employees' list, "
+                             "e.g. [{\"day\": 5, \"shift\": 1, \"count\": 6}]")
+        unknown = set(scenario.requirements) - {f.name for f in dataclasses.fields(system.ShiftRequirements)}
+        if unknown:
+            raise ValueError(f"Unknown requirements: {', '.join(sorted(unknown))}")
+        if 'rules' in scenario.requirements:
+            scenario.requirements['rules'] = tuple(rules.from_dict(rule) for rule in scenario.requirements['rules'])
+        shifts_per_day = int(scenario.requirements.get('shifts_per_day', system.ShiftRequirements.shifts_per_day))
+        for item in data.get('min_employees', []):
+            scenario.set_min_employees(int(item['day']), int(item['shift']), int(item['count']))
+        for item in data.get('availability', []):
+            scenario.set_available(str(item['employee']), int(item['day']), int(item['shift']),
+                                   bool(item['available']))
+        for item in data.get('days_off', []):
+            scenario.day_off(str(item['employee']), int(item['day']), shifts_per_day)
+        return scenario
+
+
+class ScenarioResult(NamedTuple):
+    """How a scenario's schedule scores"""
+    name: str
+    coverage: float
+    filled: int  # slots staffed by a team with the skills they need, as solver.score counts them
+    staffed: int  # slots with a full team, whatever its skills
+    slots: int
+    unfilled: int  # slots without a full team
+    shortfall: int  # hours below min_hours, summed over employees and weeks
+    fairness: float
+    seconds: float
+    schedule: Dict[int, Dict[int, List[str]]]
+    error: Optional[str] = None
+
+
+class ScenarioRunner:
+    """One loaded, sorted roster that scenarios are solved against"""
+
+    def __init__(self, source: Union[str, roster.PackedRoster, Sequence[employee.Employee], None] = None,
+                 shift_requirements: Optional[system.ShiftRequirements] = None,
+                 engine: str = 'python'):
+        """
+        Args:
+            source: Roster CSV path (the default roster if not given), a
+                PackedRoster or a list of employees
+            shift_requirements: Base requirements every scenario starts from
+            engine: Assignment engine
+        """
+        self.base = shift_requirements or system.ShiftRequirements()
+        if source is None or isinstance(source, str):
+            self._scheduler = system.EmployeeScheduler(source, engine=engine, shift_requirements=self.base)
+            # Workers read the file themselves
+            self._source = self._scheduler.file_path
+        else:
+            if not isinstance(source, roster.PackedRoster):
+                source = roster.pack_employees(source)
+            self._scheduler = system.EmployeeScheduler(engine=engine, shift_requirements=self.base,
+                                                       employees=source)
+            self._source = source
+        self._scheduler.load_employees()
+        self._scheduler.sort_employees()
+        self.names = frozenset(emp.get_name() for emp in self._scheduler.employees)
+
+    def evaluate(self, scenario: Scenario) -> ScenarioResult:
+        """Solve and score one scenario"""
+        start = time.perf_counter()
+        try:
+            unknown = {name for changes in scenario.availability.values() for name in changes} - self.names
+            if unknown:
+                raise system.EmployeeSchedulerError(f"Unknown employee(s): {', '.join(sorted(unknown))}")
+            requirements = scenario.apply(self.base)
+            schedule = self._scheduler.solve(requirements, scenario.availability).schedule
+            score = solver.score(schedule, self._scheduler.employees, requirements)
+        except (system.EmployeeSchedulerError, TypeError, ValueError) as e:
+            logger.warning(f"Scenario '{scenario.name}' failed: {e}")
+            return ScenarioResult(scenario.name, 0.0, 0, 0, 0, 0, 0, 0.0, time.perf_counter() - start, {}, str(e))
+
+        return ScenarioResult(
+            name=scenario.name,
+            coverage=score.coverage,
+            filled=score.filled,
+            staffed=score.staffed,
+            slots=score.slots,
+            unfilled=score.slots - score.staffed,
+            shortfall=score.shortfall,
+            fairness=score.fairness,
+            seconds=time.perf_counter() - start,
+            schedule={day: {shift: [emp.get_name() for emp in emps] for shift, emps in shifts.items()}
+                      for day, shifts in schedule.items()},
+        )
+
+    def evaluate_many(self, scenarios: Iterable[Scenario], max_workers: Optional[int] = None,
+                      include_baseline: bool = True) -> List[ScenarioResult]:
+        """
+        Evaluate scenarios, in order
+
+        Args:
+            scenarios: Scenarios to evaluate
+            max_workers: Worker processes, scenarios run in this process if
+                not given or 1
+            include_baseline: Evaluate the unchanged base first, as BASELINE
+
+        Returns:
+            A result per scenario, the baseline first if included
+        """
+        scenarios = list(scenarios)
+        if include_baseline:
+            scenarios.insert(0, Scenario(BASELINE))
+        if not max_workers or max_workers <= 1 or len(scenarios) <= 1:
+            return [self.evaluate(scenario) for scenario in scenarios]
+
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(self._source, self.base, self._scheduler.engine)) as pool:
+            chunksize = max(1, len(scenarios) // (max_workers * 4))
+            return list(pool.map(_evaluate_in_worker, scenarios, chunksize=chunksize))
+
+
+# Each worker process builds its runner once, from the roster path or the
+# packed roster in file order (sorting an already sorted roster would flip
+# the order of equal weightings)
+_worker_runner: Optional[ScenarioRunner] = None
+
+
+def _init_worker(source: Union[str, roster.PackedRoster], base: system.ShiftRequirements, engine: str) -> None:
+    global _worker_runner
+    logging.disable(logging.WARNING)
+    _worker_runner = ScenarioRunner(source, base, engine)
+
+
+def _evaluate_in_worker(scenario: Scenario) -> ScenarioResult:
+    return _worker_runner.evaluate(scenario)
+
+
+def comparison_table(results: Sequence[ScenarioResult]) -> List[Dict[str, Any]]:
+    """
+    One row per scenario with its scores and the change from the baseline
+
+    The baseline is the result named BASELINE, or the first result.
+    """
+    if not results:
+        return []
+    baseline = next((result for result in results if result.name == BASELINE), results[0])
+    rows = []
+    for result in results:
+        row = {
+            'scenario': result.name,
+            'coverage': round(result.coverage, 4),
+            'staffed_slots': result.staffed,
+            'staffed_with_skills': result.filled,
+            'unfilled_slots': result.unfilled,
+            'hours_shortfall': result.shortfall,
+            'fairness': round(result.fairness, 4),
+            'seconds': round(result.seconds, 4),
+        }
+        if result.error is None and baseline.error is None:
+            row['unfilled_change'] = result.unfilled - baseline.unfilled
+            row['staffed_with_skills_change'] = result.filled - baseline.filled
+            row['shortfall_change'] = result.shortfall - baseline.shortfall
+        else:
+            row['error'] = result.error or f"baseline failed: {baseline.error}"
+        rows.append(row)
+    return rows
@@ -0,0 +1,415 @@
+"""
+Branch-and-bound schedule solver.
+
+The greedy assigner fills slots one at a time and never revisits a choice, so
+a slot can end up empty because an earlier slot used the only people who could
+have filled it. This solver searches over whole-week assignments:
+
+* each slot is either given a team or left empty. Candidate teams are the
+  greedy's own team, one built in greedy order (furthest from minimum hours
+  first) and one that prefers employees with the fewest other options in the
+  rest of the week, all from employees who are available and have capacity
+* an employee can work at most ceil(min_hours / SHIFT_HOURS) shifts a week,
+  which is the same cap the greedy enforces
+* a team must itself contain the opener, bartender or closer its slot needs
+* branches are pruned when even filling every remaining slot, with each seat
+  taking a full shift off somebody's hours shortfall, can't beat the best
+  (coverage, shortfall) found so far
+
+The search is warm-started from the greedy schedule and stops at the time
+budget, returning the best schedule found. The greedy week itself, teams
+lacking a skill included, is where the search starts: it is only replaced by a
+schedule that scores better and staffs at least as many slots. Building the
+per-slot tables counts against the budget too, and a week whose budget runs out
+before the search starts keeps the greedy week. Weeks are independent because
+worked hours reset every week, so each week gets its own share of the budget.
+
+Schedules are scored by coverage (share of slots filled with a team that meets
+the requirements) and fairness (1 - hours shortfall / total minimum hours).
+"""
+
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import employee
+
+# Schedule in the form EmployeeScheduler returns it
+Schedule = Dict[int, Dict[int, List[employee.Employee]]]
+# is_available(emp, day, shift)
+Availability = Callable[[employee.Employee, int, int], bool]
+
+OPENER, BARTENDER, CLOSER = 'opener', 'bartender', 'closer'
+
+
+class SolverResult(NamedTuple):
+    schedule: Schedule
+    coverage: float
+    fairness: float
+    filled: int
+    slots: int
+    nodes: int
+    elapsed: float
+    # Every week's search ran to the end within the budget. The search only tries
+    # a few candidate teams per slot, so this doesn't make the schedule optimal
+    search_complete: bool
+
+
+class ScheduleScore(NamedTuple):
+    coverage: float
+    fairness: float
+    filled: int  # slots with a full team that has the skills the slot needs
+    slots: int
+    shortfall: int
+    staffed: int  # slots with a full team, whatever its skills
+
+
+def shift_cap(emp: employee.Employee) -> int:
+    """Most shifts an employee can get in a week"""
+    return -(-emp.get_min_hours() // employee.SHIFT_HOURS)
+
+
+def slot_needs(requirements, shift: int) -> Tuple[str, ...]:
+    """Skills a team for this shift must include"""
+    needs = []
+    if shift == 0 and requirements.needs_opener:
+        needs.append(OPENER)
+    if shift == 0 and requirements.needs_bartender:
+        needs.append(BARTENDER)
+    if shift == requirements.shifts_per_day - 1 and requirements.needs_closer:
+        needs.append(CLOSER)
+    return tuple(needs)
+
+
+def _has(emp: employee.Employee, skill: str) -> bool:
+    if skill == OPENER:
+        return emp.get_opening()
+    if skill == BARTENDER:
+        return emp.get_bar()
+    return emp.get_closing()
+
+
+def _team_valid(team: Sequence[employee.Employee], size: int, needs: Tuple[str, ...]) -> bool:
+    return len(team) == size and all(any(_has(emp, skill) for emp in team) for skill in needs)
+
+
+def score(schedule: Schedule, employees: Sequence[employee.Employee], requirements) -> ScheduleScore:
+    """Coverage and fairness of a schedule"""
+    slots = filled = staffed = 0
+    for day in range(requirements.days):
+        for shift in range(requirements.shifts_per_day):
+            size = requirements.get_min_employees(day, shift)
+            if size <= 0:
+                continue
+            slots += 1
+            team = schedule.get(day, {}).get(shift, [])
+            if len(team) == size:
+                staffed += 1
+            if _team_valid(team, size, slot_needs(requirements, shift)):
+                filled += 1
+
+    weeks = -(-requirements.days // requirements.days_per_week)
+    shortfall = 0
+    for week in range(weeks):
+        worked: Dict[str, int] = {}
+        first = week * requirements.days_per_week
+        for day in range(first, min(first + requirements.days_per_week, requirements.days)):
+            for team in schedule.get(day, {}).values():
+                for emp in team:
+                    # By name, the schedule's employees may come from another load
+                    worked[emp.get_name()] = worked.get(emp.get_name(), 0) + employee.SHIFT_HOURS
+        shortfall += sum(max(0, emp.get_min_hours() - worked.get(emp.get_name(), 0)) for emp in employees)
+
+    total_min_hours = sum(emp.get_min_hours() for emp in employees) * weeks
+    return ScheduleScore(
+        coverage=filled / slots if slots else 1.0,
+        fairness=1.0 - shortfall / total_min_hours if total_min_hours else 1.0,
+        filled=filled,
+        slots=slots,
+        shortfall=shortfall,
+        staffed=staffed,
+    )
+
+
+class _WeekSearch:
+    """Depth-first branch and bound over the slots of one week"""
+
+    def __init__(self, employees: Sequence[employee.Employee], min_hours: List[int], caps: List[int],
+                 slots: List[Tuple[int, int]], requirements, is_available: Availability,
+                 warm: List[List[int]], deadline: float):
+        """
+        Args:
+            employees: Roster, in weighting order
+            min_hours: Minimum hours by roster position
+            caps: shift_cap by roster position
+            slots: (day, shift) of every slot in the week
+            requirements: ShiftRequirements for the horizon
+            is_available: Availability test, including any per-slot overrides
+            warm: The greedy team of each slot, as roster positions
+            deadline: time.perf_counter() value to stop at
+        """
+        self.employees = employees
+        self.slots = slots
+        self.is_available = is_available
+        self.deadline = deadline
+        self.nodes = 0
+        self.complete = True
+
+        count = len(employees)
+        self.sizes = [requirements.get_min_employees(day, shift) for day, shift in slots]
+        self.needs = [slot_needs(requirements, shift) for _, shift in slots]
+        self.caps = caps
+        self.used = [0] * count
+        self.min_hours = min_hours
+        # Hours shortfall of the current assignment, kept up to date by _take and _release
+        self.shortfall = sum(max(0, hours) for hours in self.min_hours)
+
+        # Slots that can be filled and seats in them from each position on, for the bound
+        self.fillable_from = [0] * (len(slots) + 1)
+        self.seats_from = [0] * (len(slots) + 1)
+        for position in range(len(slots) - 1, -1, -1):
+            size = max(0, self.sizes[position])
+            self.fillable_from[position] = self.fillable_from[position + 1] + (1 if size else 0)
+            self.seats_from[position] = self.seats_from[position + 1] + size
+
+        # Filled by _build_tables: available employees per slot and how many of
+        # the remaining slots each employee could still work
+        self.available: List[List[int]] = []
+        self.remaining_options: List[List[int]] = []
+
+        self.warm = warm
+        self.assignment: List[Optional[Tuple[int, ...]]] = [None] * len(slots)
+        # The greedy week as it is, so nothing worse than it is ever returned
+        self.best: List[Optional[Tuple[int, ...]]] = [tuple(team) if team else None for team in warm]
+        self.best_key = self._warm_key()
+        # Slots the greedy week staffs, a schedule staffing fewer isn't accepted
+        self.floor = sum(1 for team, size in zip(warm, self.sizes) if size > 0 and len(team) == size)
+
+    def run(self) -> List[Optional[Tuple[int, ...]]]:
+        if self._build_tables():
+            self._search(0, 0)
+        else:
+            self.complete = False
+        return self.best
+
+    def _warm_key(self) -> Tuple[int, int]:
+        """(filled, -shortfall) of the greedy week, teams lacking a skill count as unfilled"""
+        filled = sum(
+            1 for position, team in enumerate(self.warm)
+            if team and _team_valid([self.employees[index] for index in team],
+                                    self.sizes[position], self.needs[position])
+        )
+        shortfall = self.shortfall
+        shifts: Dict[int, int] = {}
+        for team in self.warm:
+            for index in team:
+                used = shifts.get(index, 0)
+                shortfall -= min(employee.SHIFT_HOURS,
+                                 max(0, self.min_hours[index] - used * employee.SHIFT_HOURS))
+                shifts[index] = used + 1
+        return filled, -shortfall
+
+    def _build_tables(self) -> bool:
+        """Per-slot availability and remaining options, False if the deadline passes first"""
+        count = len(self.employees)
+        for day, shift in self.slots:
+            if time.perf_counter() > self.deadline:
+                return False
+            self.available.append(
+                [index for index, emp in enumerate(self.employees) if self.is_available(emp, day, shift)])
+        # Used to prefer people with few other options
+        self.remaining_options = [[] for _ in self.slots]
+        running = [0] * count
+        for position in range(len(self.slots) - 1, -1, -1):
+            if time.perf_counter() > self.deadline:
+                return False
+            self.remaining_options[position] = running[:]
+            for index in self.available[position]:
+                running[index] += 1
+        return True
+
+    def _fits(self, team: List[int], position: int) -> bool:
+        return (_team_valid([self.employees[index] for index in team],
+                            self.sizes[position], self.needs[position])
+                and len(set(team)) == len(team)
+                and all(self.used[index] < self.caps[index] for index in team))
+
+    def _take(self, position: int, team: Tuple[int, ...]) -> None:
+        self.assignment[position] = team
+        for index in team:
+            self.shortfall -= self._gain(index)
+            self.used[index] += 1
+
+    def _release(self, position: int) -> None:
+        for index in self.assignment[position]:
+            self.used[index] -= 1
+            self.shortfall += self._gain(index)
+        self.assignment[position] = None
+
+    def _gain(self, index: int) -> int:
+        """Hours shortfall one more shift for this employee takes away"""
+        remaining = self.min_hours[index] - self.used[index] * employee.SHIFT_HOURS
+        return min(employee.SHIFT_HOURS, max(0, remaining))
+
+    def _bound(self, position: int, filled: int) -> Tuple[int, int]:
+        """Best key any completion of the slots before position could reach"""
+        return (filled + self.fillable_from[position],
+                -max(0, self.shortfall - self.seats_from[position] * employee.SHIFT_HOURS))
+
+    def _consider_leaf(self) -> None:
+        # Every team the search builds has its skills, so filled slots are staffed ones
+        filled = sum(1 for team in self.assignment if team is not None)
+        if filled < self.floor:
+            return
+        key = (filled, -self.shortfall)
+        if key > self.best_key:
+            self.best_key = key
+            self.best = list(self.assignment)
+
+    def _search(self, position: int, filled: int) -> bool:
+        """Returns False once the time budget has run out"""
+        self.nodes += 1
+        if self.best_key >= self._bound(0, 0):
+            # The best schedule already reaches the bound, nothing left to find
+            return False
+        if time.perf_counter() > self.deadline:
+            self.complete = False
+            return False
+        if position == len(self.slots):
+            self._consider_leaf()
+            return True
+        # Even the best completion can't beat what we have, or staff as many slots as the greedy
+        if self._bound(position, filled) <= self.best_key or filled + self.fillable_from[position] < self.floor:
+            return True
+
+        if self.sizes[position] > 0:
+            for team in self._teams(position):
+                self._take(position, team)
+                carry_on = self._search(position + 1, filled + 1)
+                self._release(position)
+                if not carry_on:
+                    return False
+        return self._search(position + 1, filled)
+
+    def _teams(self, position: int) -> List[Tuple[int, ...]]:
+        """Candidate teams for a slot, most promising first, none once the deadline has passed"""
+        if time.perf_counter() > self.deadline:
+            return []
+        eligible = [index for index in self.available[position] if self.used[index] < self.caps[index]]
+        size = self.sizes[position]
+        if len(eligible) < size:
+            return []
+
+        options = self.remaining_options[position]
+        orderings = [
+            # Greedy: furthest from minimum hours, then weighting
+            sorted(eligible, key=lambda index: (
+                self.used[index] * employee.SHIFT_HOURS - self.min_hours[index], index)),
+            # Employees who can't help much with the rest of the week
+            sorted(eligible, key=lambda index: (
+                options[index] - (self.caps[index] - self.used[index]), index)),
+        ]
+
+        teams: List[Tuple[int, ...]] = []
+        seen: set = set()
+        warm = self.warm[position]
+        if self._fits(warm, position):
+            teams.append(tuple(warm))
+            seen.add(frozenset(warm))
+        for ordering in orderings:
+            if time.perf_counter() > self.deadline:
+                break
+            team = self._build_team(ordering, position)
+            if team is not None and frozenset(team) not in seen:
+                seen.add(frozenset(team))
+                teams.append(team)
+        return teams
+
+    def _build_team(self, ordering: List[int], position: int) -> Optional[Tuple[int, ...]]:
+        """Take the first employee covering each missing skill, then fill up in order"""
+        size = self.sizes[position]
+        team: List[int] = []
+        members: set = set()
+        for skill in self.needs[position]:
+            if any(_has(self.employees[index], skill) for index in team):
+                continue
+            for index in ordering:
+                if index not in members and _has(self.employees[index], skill):
+                    team.append(index)
+                    members.add(index)
+                    break
+            else:
+                return None
+        if len(team) > size:
+            return None
+        for index in ordering:
+            if len(team) == size:
+                break
+            if index not in members:
+                team.append(index)
+                members.add(index)
+        return tuple(team) if len(team) == size else None
+
+
+def solve(employees: Sequence[employee.Employee], warm_start: Schedule, requirements,
+          is_available: Availability, time_budget: float = 1.0) -> SolverResult:
+    """
+    Search for a schedule that fills more slots than the greedy one
+
+    Args:
+        employees: Roster, in weighting order
+        warm_start: Greedy schedule to start from
+        requirements: ShiftRequirements for the horizon
+        is_available: Availability test, including any per-slot overrides
+        time_budget: Wall-clock seconds to spend searching
+
+    Returns:
+        SolverResult with the best schedule found and its scores
+    """
+    start = time.perf_counter()
+    deadline = start + time_budget
+    weeks = -(-requirements.days // requirements.days_per_week)
+
+    index_of = {id(emp): index for index, emp in enumerate(employees)}
+    min_hours = [emp.get_min_hours() for emp in employees]
+    caps = [shift_cap(emp) for emp in employees]
+    schedule: Schedule = {}
+    nodes = filled = slot_count = shortfall = 0
+    complete = True
+    for week in range(weeks):
+        first = week * requirements.days_per_week
+        days = range(first, min(first + requirements.days_per_week, requirements.days))
+        slots = [(day, shift) for day in days for shift in range(requirements.shifts_per_day)]
+
+        # Split what's left of the budget evenly over the remaining weeks
+        now = time.perf_counter()
+        week_deadline = now + max(0.0, deadline - now) / (weeks - week)
+        warm = [
+            [index_of[id(emp)] for emp in warm_start.get(day, {}).get(shift, []) if id(emp) in index_of]
+            for day, shift in slots
+        ]
+        search = _WeekSearch(employees, min_hours, caps, slots, requirements, is_available, warm, week_deadline)
+        best = search.run()
+        nodes += search.nodes
+        complete = complete and search.complete
+        # The week's key is its score, no need to go over the roster again
+        filled += search.best_key[0]
+        shortfall -= search.best_key[1]
+        slot_count += search.fillable_from[0]
+
+        for day in days:
+            schedule[day] = {}
+        for (day, shift), team in zip(slots, best):
+            if team is not None:
+                schedule[day][shift] = [employees[index] for index in team]
+
+    total_min_hours = sum(min_hours) * weeks
+    return SolverResult(
+        schedule=schedule,
+        coverage=filled / slot_count if slot_count else 1.0,
+        fairness=1.0 - shortfall / total_min_hours if total_min_hours else 1.0,
+        filled=filled,
+        slots=slot_count,
+        nodes=nodes,
+        elapsed=time.perf_counter() - start,
+        search_complete=complete,
+    )
@@ -0,0 +1,402 @@
+"""
+SQLite roster and schedule store.
+
+Rosters are imported once, from a CSV or from Employee objects, and
+generated schedules are kept with the hours each employee ended up with, so
+neither has to be rebuilt from employees.txt and past schedules can be
+queried without loading them whole:
+
+* employees       one row per employee of a named roster, in file order
+* availability    one row per (slot, employee) the employee can work,
+                  indexed by slot for "who can work slot i"
+* schedules       one row per saved schedule, indexed by roster and time
+* assignments     one row per (day, shift, employee) of a schedule, keyed on
+                  the slot for "who is on day d shift s", plus an index by
+                  employee name for someone's history
+* schedule_hours  worked and minimum hours per employee and week of a
+                  schedule, keyed on the employee's position in the roster
+                  it was saved with (names needn't be unique) and indexed on
+                  the shortfall for "who is under min_hours"
+
+Writes go through executemany in one transaction per roster or schedule.
+Each thread (and each worker process) gets its own connection, opened on
+first use and reused after that. get_roster() keeps the parsed roster until
+the roster is saved again.
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import employee
+import roster
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rosters (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL,
+    revision INTEGER NOT NULL DEFAULT 0,
+    size INTEGER NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS employees (
+    roster_id INTEGER NOT NULL REFERENCES rosters(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    min_hours INTEGER NOT NULL,
+    bar INTEGER NOT NULL,
+    experience REAL NOT NULL,
+    opening INTEGER NOT NULL,
+    closing INTEGER NOT NULL,
+    availability INTEGER NOT NULL,
+    shift_count INTEGER NOT NULL,
+    PRIMARY KEY (roster_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS employees_by_name ON employees (roster_id, name);
+CREATE TABLE IF NOT EXISTS availability (
+    roster_id INTEGER NOT NULL REFERENCES rosters(id) ON DELETE CASCADE,
+    slot INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (roster_id, slot, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS schedules (
+    id INTEGER PRIMARY KEY,
+    roster_id INTEGER NOT NULL REFERENCES rosters(id) ON DELETE CASCADE,
+    version TEXT,
+    created REAL NOT NULL,
+    days INTEGER NOT NULL,
+    shifts_per_day INTEGER NOT NULL,
+    days_per_week INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS schedules_by_roster ON schedules (roster_id, created);
+CREATE TABLE IF NOT EXISTS assignments (
+    schedule_id INTEGER NOT NULL REFERENCES schedules(id) ON DELETE CASCADE,
+    day INTEGER NOT NULL,
+    shift INTEGER NOT NULL,
+    seat INTEGER NOT NULL,
+    employee TEXT NOT NULL,
+    PRIMARY KEY (schedule_id, day, shift, seat)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS assignments_by_employee ON assignments (employee, schedule_id);
+CREATE TABLE IF NOT EXISTS schedule_hours (
+    schedule_id INTEGER NOT NULL REFERENCES schedules(id) ON DELETE CASCADE,
+    week INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    employee TEXT NOT NULL,
+    min_hours INTEGER NOT NULL,
+    worked_hours INTEGER NOT NULL,
+    shortfall INTEGER NOT NULL,
+    PRIMARY KEY (schedule_id, week, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS schedule_hours_by_shortfall ON schedule_hours (schedule_id, week, shortfall);
+"""
+
+# Rows per executemany batch when importing
+BATCH_SIZE = 5000
+
+
+class StoreError(Exception):
+    """Raised for missing rosters or schedules"""
+    pass
+
+
+class ScheduleInfo(NamedTuple):
+    id: int
+    roster: str
+    version: Optional[str]
+    created: float
+    days: int
+    shifts_per_day: int
+    days_per_week: int
+
+
+class Shortfall(NamedTuple):
+    employee: str
+    min_hours: int
+    worked_hours: int
+
+
+class RosterStore:
+    """Rosters and generated schedules in one SQLite database"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Database file, created with the schema if it doesn't exist
+        """
+        self.path = path
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        # Parsed rosters by name, with the revision they were read at
+        self._rosters: Dict[str, Tuple[int, Tuple[employee.Employee, ...]]] = {}
+        self._connection().executescript(SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        """This thread's connection, a forked worker process opens its own"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self.path, timeout=30.0, check_same_thread=False)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.execute('PRAGMA foreign_keys=ON')
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        with self._lock:
+            self._connections.append(connection)
+        return connection
+
+    def close(self) -> None:
+        """Close every connection this store opened"""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+    def __enter__(self) -> "RosterStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # Rosters
+
+    def import_csv(self, path: str, name: str, chunk_size: int = roster.DEFAULT_CHUNK_SIZE) -> int:
+        """
+        Stream a roster CSV into the store, replacing any roster with the same name
+
+        Returns:
+            Number of employees imported
+        """
+        try:
+            return self._save_chunks(name, roster.iter_roster_chunks(path, chunk_size))
+        except roster.RosterFormatError as e:
+            raise StoreError(f"Could not import {path}: {e}")
+
+    def save_roster(self, name: str, employees: Iterable[employee.Employee]) -> int:
+        """
+        Store a roster under a name, replacing any roster with the same name
+
+        Returns:
+            Number of employees stored
+        """
+        employees = list(employees)
+        chunks = (roster.pack_employees(employees[start:start + BATCH_SIZE])
+                  for start in range(0, len(employees), BATCH_SIZE))
+        return self._save_chunks(name, chunks)
+
+    def _save_chunks(self, name: str, chunks: Iterator[roster.PackedRoster]) -> int:
+        connection = self._connection()
+        # roster.fingerprint_employees, so a roster has the same fingerprint
+        # whether it was loaded from the CSV or from here
+        digest = roster.fingerprint_digest()
+        fingerprint = roster.fingerprint_employees((), digest)
+        size = 0
+        with connection:
+            roster_id = self._replace_roster(connection, name)
+            for chunk in chunks:
+                fingerprint = roster.fingerprint_employees(roster.unpack_employees(chunk), digest)
+                positions = range(size, size + len(chunk))
+                connection.executemany(
+                    'INSERT INTO employees VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                    ((roster_id, position, *fields) for position, *fields in zip(
+                        positions, chunk.names, chunk.min_hours, chunk.bar, chunk.experience,
+                        chunk.opening, chunk.closing, chunk.availability, chunk.shift_counts)),
+                )
+                connection.executemany(
+                    'INSERT INTO availability VALUES (?, ?, ?)',
+                    ((roster_id, slot, position)
+                     for position, mask, shift_count in zip(positions, chunk.availability, chunk.shift_counts)
+                     for slot in range(shift_count) if mask >> slot & 1),
+                )
+                size += len(chunk)
+            connection.execute(
+                'UPDATE rosters SET fingerprint = ?, size = ?, updated = ? WHERE id = ?',
+                (fingerprint, size, time.time(), roster_id),
+            )
+        return size
+
+    @staticmethod
+    def _replace_roster(connection: sqlite3.Connection, name: str) -> int:
+        row = connection.execute('SELECT id FROM rosters WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return connection.execute(
+                "INSERT INTO rosters (name, fingerprint, size, updated) VALUES (?, '', 0, ?)",
+                (name, time.time()),
+            ).lastrowid
+        roster_id = row[0]
+        connection.execute('DELETE FROM employees WHERE roster_id = ?', (roster_id,))
+        connection.execute('DELETE FROM availability WHERE roster_id = ?', (roster_id,))
+        connection.execute('UPDATE rosters SET revision = revision + 1 WHERE id = ?', (roster_id,))
+        return roster_id
+
+    def _roster_id(self, name: str) -> int:
+        row = self._connection().execute('SELECT id FROM rosters WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise StoreError(f"No roster named '{name}'")
+        return row[0]
+
+    def rosters(self) -> List[str]:
+        return [row[0] for row in self._connection().execute('SELECT name FROM rosters ORDER BY name')]
+
+    def roster_version(self, name: str) -> Tuple[int, str]:
+        """(revision, fingerprint) of a roster, the revision goes up on every save"""
+        row = self._connection().execute(
+            'SELECT revision, fingerprint FROM rosters WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            raise StoreError(f"No roster named '{name}'")
+        return row[0], row[1]
+
+    def get_roster(self, name: str) -> List[employee.Employee]:
+        """
+        Fresh employees for a roster, only read from the database again after
+        the roster has been saved since the last read
+        """
+        revision, _ = self.roster_version(name)
+        with self._lock:
+            cached = self._rosters.get(name)
+        if cached is None or cached[0] != revision:
+            cached = (revision, tuple(self.load_roster(name)))
+            with self._lock:
+                self._rosters[name] = cached
+        return [emp.fresh_copy() for emp in cached[1]]
+
+    def load_roster(self, name: str) -> List[employee.Employee]:
+        """Every employee of a roster, in file order"""
+        cursor = self._connection().execute(
+            'SELECT name, min_hours, bar, experience, opening, closing, availability, shift_count '
+            'FROM employees WHERE roster_id = ? ORDER BY position', (self._roster_id(name),))
+        employees: List[employee.Employee] = []
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                return employees
+            employees.extend(
+                employee.Employee.from_mask(name, min_hours, bool(bar), experience,
+                                            bool(opening), bool(closing), availability, shift_count)
+                for name, min_hours, bar, experience, opening, closing, availability, shift_count in rows
+            )
+
+    def available(self, name: str, slot: int) -> List[str]:
+        """Names of the employees who can work a weekly availability slot, in file order"""
+        return [row[0] for row in self._connection().execute(
+            'SELECT e.name FROM availability a '
+            'JOIN employees e ON e.roster_id = a.roster_id AND e.position = a.position '
+            'WHERE a.roster_id = ? AND a.slot = ? ORDER BY a.position',
+            (self._roster_id(name), slot))]
+
+    # Schedules
+
+    def save_schedule(self, name: str, schedule: Dict[int, Dict[int, List[employee.Employee]]],
+                      employees: Iterable[employee.Employee], requirements,
+                      version: Optional[str] = None) -> int:
+        """
+        Store a schedule generated from a roster
+
+        Args:
+            name: Roster the schedule was generated from
+            schedule: Schedule as EmployeeScheduler returns it
+            employees: The roster's employees, for the per-week hours, which are kept by
+                position in this sequence
+            requirements: ShiftRequirements the schedule was generated for
+            version: EmployeeScheduler.schedule_version() of the schedule, if known
+
+        Returns:
+            Id of the stored schedule
+        """
+        spw = requirements.days_per_week
+        employees = list(employees)
+        # By identity, employees can share a name. By name only for a
+        # schedule whose Employee objects come from another load
+        positions = {id(emp): position for position, emp in enumerate(employees)}
+        by_name: Dict[str, int] = {}
+        for position, emp in enumerate(employees):
+            by_name.setdefault(emp.get_name(), position)
+
+        worked: Dict[Tuple[int, int], int] = {}
+        assignments = []
+        for day, shifts in schedule.items():
+            for shift, team in shifts.items():
+                for seat, emp in enumerate(team):
+                    assignments.append((day, shift, seat, emp.get_name()))
+                    position = positions.get(id(emp), by_name.get(emp.get_name()))
+                    if position is None:
+                        raise StoreError(f"Scheduled employee '{emp.get_name()}' is not on the roster")
+                    key = (day // spw, position)
+                    worked[key] = worked.get(key, 0) + employee.SHIFT_HOURS
+
+        weeks = -(-requirements.days // spw)
+        hours = []
+        for position, emp in enumerate(employees):
+            for week in range(weeks):
+                worked_hours = worked.get((week, position), 0)
+                hours.append((week, position, emp.get_name(), emp.get_min_hours(), worked_hours,
+                               emp.get_min_hours() - worked_hours))
+
+        connection = self._connection()
+        with connection:
+            schedule_id = connection.execute(
+                'INSERT INTO schedules (roster_id, version, created, days, shifts_per_day, days_per_week) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (self._roster_id(name), version, time.time(), requirements.days,
+                 requirements.shifts_per_day, spw),
+            ).lastrowid
+            connection.executemany(
+                'INSERT INTO assignments VALUES (?, ?, ?, ?, ?)',
+                ((schedule_id, *assignment) for assignment in assignments),
+            )
+            connection.executemany(
+                'INSERT INTO schedule_hours VALUES (?, ?, ?, ?, ?, ?, ?)',
+                ((schedule_id, *row) for row in hours),
+            )
+        return schedule_id
+
+    def schedules(self, name: str, limit: int = 20) -> List[ScheduleInfo]:
+        """Most recently saved schedules of a roster, newest first"""
+        return [ScheduleInfo(row[0], name, *row[1:]) for row in self._connection().execute(
+            'SELECT id, version, created, days, shifts_per_day, days_per_week FROM schedules '
+            'WHERE roster_id = ? ORDER BY created DESC LIMIT ?', (self._roster_id(name), limit))]
+
+    def find_schedule(self, name: str, version: str) -> Optional[int]:
+        """Id of the newest schedule of a roster with this version"""
+        row = self._connection().execute(
+            'SELECT id FROM schedules WHERE roster_id = ? AND version = ? ORDER BY created DESC LIMIT 1',
+            (self._roster_id(name), version)).fetchone()
+        return row[0] if row else None
+
+    def load_schedule(self, schedule_id: int) -> Dict[int, Dict[int, List[str]]]:
+        """A stored schedule with employee names"""
+        schedule: Dict[int, Dict[int, List[str]]] = {}
+        for day, shift, name in self._connection().execute(
+                'SELECT day, shift, employee FROM assignments WHERE schedule_id = ? '
+                'ORDER BY day, shift, seat', (schedule_id,)):
+            schedule.setdefault(day, {}).setdefault(shift, []).append(name)
+        return schedule
+
+    def scheduled(self, schedule_id: int, day: int, shift: int) -> List[str]:
+        """Who is on a given day and shift of a stored schedule"""
+        return [row[0] for row in self._connection().execute(
+            'SELECT employee FROM assignments WHERE schedule_id = ? AND day = ? AND shift = ? ORDER BY seat',
+            (schedule_id, day, shift))]
+
+    def under_min_hours(self, schedule_id: int, week: int = 0) -> List[Shortfall]:
+        """Employees who got fewer than their minimum hours in a week, biggest shortfall first"""
+        return [Shortfall(*row) for row in self._connection().execute(
+            'SELECT employee, min_hours, worked_hours FROM schedule_hours '
+            'WHERE schedule_id = ? AND week = ? AND shortfall > 0 ORDER BY shortfall DESC',
+            (schedule_id, week))]
+
+    def employee_history(self, name: str, employee_name: str, limit: int = 100) -> List[Tuple[int, int, int]]:
+        """(schedule id, day, shift) of someone's most recent assignments in a roster's schedules"""
+        return [tuple(row) for row in self._connection().execute(
+            'SELECT a.schedule_id, a.day, a.shift FROM assignments a '
+            'JOIN schedules s ON s.id = a.schedule_id '
+            'WHERE a.employee = ? AND s.roster_id = ? '
+            'ORDER BY a.schedule_id DESC, a.day, a.shift LIMIT ?',
+            (employee_name, self._roster_id(name), limit))]
@@ -1,19 +1,21 @@
 # cleaned up the code using AI, coz im a beta male
 
 import employee
-from typing import List, Optional
+from typing import List, Optional, Union
 import csv
-from csv import DictReader
 import constants
-import numpy as np
-from dataclasses import dataclass
-from typing import Dict, Set, Tuple
+import roster
+import ordering
+import rules
+import instrumentation
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, NamedTuple, Tuple
 import os
 import logging
-from pathlib import Path
+import threading
+import time
+from collections import OrderedDict
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 @dataclass # no need for constants class anymore, delete it future midhun
@@ -23,17 +25,102 @@ class ShiftRequirements:
     needs_bartender: bool = True
     needs_opener: bool = True
     needs_closer: bool = True
+    days: int = 7  # Planning horizon, may span several weeks
+    shifts_per_day: int = 2  # First shift of the day opens, last one closes
+    days_per_week: int = 7  # min_hours and worked hours reset every week
+    # min_employees for specific (weekday, shift) slots, e.g. {(5, 1): 8} for
+    # Saturday evening, applied in every week of the horizon
+    min_employees_overrides: Dict[Tuple[int, int], int] = field(default_factory=dict)
+    # rules.MinSkill, MaxConsecutiveShifts, RestAfterClosing and MaxHours on
+    # top of min_employees and the needs_* flags
+    rules: Tuple[Any, ...] = ()
 
     def get_min_employees(self, day: int, shift: int):
         """
         Allows for overriding the default min_employees for specific days/shifts
         """
-        # if day == 5 and shift == 1:  # Saturday Evening (day 5, shift 1)
-        #     return 8
-        # if day == 6 and shift == 0:  # Sunday Morning (day 6, shift 0)
-        #     return 8
+        if self.min_employees_overrides:
+            return self.min_employees_overrides.get((day % self.days_per_week, shift), self.min_employees)
         return self.min_employees  # Default for other shifts
 
+    def availability_index(self, day: int, shift: int) -> int:
+        """Index of a slot in an employee's weekly availability"""
+        return (day % self.days_per_week) * self.shifts_per_day + shift
+
+    def cache_key(self) -> Tuple:
+        """Every parameter that affects the schedule, including per-slot overrides"""
+        return (
+            self.min_employees,
+            self.needs_bartender,
+            self.needs_opener,
+            self.needs_closer,
+            self.days,
+            self.shifts_per_day,
+            self.days_per_week,
+            # Overrides repeat every week, days is already part of the key
+            tuple(self.get_min_employees(day, shift)
+                  for day in range(min(self.days, self.days_per_week))
+                  for shift in range(self.shifts_per_day)),
+            tuple(self.rules),
+        )
+
+
+class CachedSchedule(NamedTuple):
+    """A schedule in ScheduleCache"""
+    # As the run that stored it returned it, with that run's Employee objects
+    schedule: Dict[int, Dict[int, List[employee.Employee]]]
+    # The same teams as positions in the weighting-ordered roster, which any
+    # load of the same roster contents and weighting sorts the same way
+    positions: Dict[int, Dict[int, Tuple[int, ...]]]
+
+
+class ScheduleCache:
+    """LRU cache of calculated schedules keyed by roster fingerprint and requirements"""
+
+    def __init__(self, maxsize: int = 128):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple, CachedSchedule]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[CachedSchedule]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return entry._replace(schedule=self._copy(entry.schedule))
+
+    def put(self, key: Tuple, schedule: Dict[int, Dict[int, List[employee.Employee]]],
+            positions: Dict[int, Dict[int, Tuple[int, ...]]]) -> None:
+        with self._lock:
+            self._entries[key] = CachedSchedule(self._copy(schedule), positions)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'size': len(self._entries), 'maxsize': self.maxsize}
+
+    @staticmethod
+    def _copy(schedule: Dict[int, Dict[int, List[employee.Employee]]]) -> Dict[int, Dict[int, List[employee.Employee]]]:
+        # Callers get their own dicts and lists, the Employee objects are shared
+        return {day: {shift: list(emps) for shift, emps in shifts.items()}
+                for day, shifts in schedule.items()}
+
+
+schedule_cache = ScheduleCache()
+
 
 # made these coz im too good of a coder
 class EmployeeSchedulerError(Exception):
@@ -44,103 +131,361 @@ class FileNotFoundError(EmployeeSchedulerError):
     """Raised when employee data file cannot be found"""
     pass
 
+# Default roster path resolved per working directory, so every new scheduler
+# doesn't have to probe the filesystem again
+_default_paths: Dict[str, str] = {}
+
+@dataclass
+class RunContext:
+    """
+    Everything a single solve changes
+
+    The loaded roster and the engine's index of it are shared by every run and
+    only ever read. Worked hours, rule state and the schedule being built live
+    here, so any number of runs can share one loaded EmployeeScheduler.
+    """
+    # Shared, read-only: roster in weighting order and the engine's index of it
+    employees: List[employee.Employee]
+    positions: Dict[int, int]  # id(employee) -> roster position
+    names: Dict[str, int]  # employee name -> roster position
+    index: Optional[ordering.CandidateIndex]
+    matrix: Any  # engine.AvailabilityMatrix with the numpy engine
+    # This run's own
+    requirements: ShiftRequirements
+    overrides: Dict[Tuple[int, int], Dict[str, bool]]
+    stats: instrumentation.SchedulerStats
+    schedule: Dict[int, Dict[int, List[employee.Employee]]] = field(default_factory=dict)
+    # Hours worked this week by roster position, a NumPy array with the numpy engine
+    worked_hours: Any = None
+    queue: Optional[ordering.DeficitQueue] = None
+    rule_set: Optional[rules.RuleSet] = None
+    solver_result: Any = None  # solver.SolverResult, unless the greedy solver ran
+    # Called as on_slot(day, shift, assigned_employees) after each slot is solved
+    on_slot: Optional[Callable[[int, int, Optional[List[employee.Employee]]], None]] = None
+
+
+class RunResult(NamedTuple):
+    """What EmployeeScheduler.solve hands back from a run"""
+    schedule: Dict[int, Dict[int, List[employee.Employee]]]
+    # Hours each employee works in the horizon's last week, by name
+    worked_hours: Dict[str, int]
+    solver_result: Any  # solver.SolverResult, None with the greedy solver
+    stats: instrumentation.SchedulerStats
+
+
+def _resolve_default_path() -> str:
+    """Find the employee data file in one of the usual locations"""
+    cwd = os.getcwd()
+    if cwd in _default_paths:
+        return _default_paths[cwd]
+
+    # Try different possible file locations, coz this shit is fuckijgn me in the ass
+    possible_paths = [
+        constants.Files.EMPLOYEES.value,
+        os.path.join('Register', 'employees.txt'),
+        os.path.join('..', 'Register', 'employees.txt'),
+        'employees.txt'
+    ]
+
+    for path in possible_paths:
+        if os.path.exists(path):
+            _default_paths[cwd] = path
+            return path
+
+    # If no file is found, raise an error with helpful message
+    raise FileNotFoundError(
+        f"Could not find employee data file. Tried paths: {', '.join(possible_paths)}\n"
+        f"Current working directory: {cwd}\n"
+        "Please ensure the employee data file exists in one of these locations."
+    )
+
+def _last_week_shifts(schedule: Dict[int, Dict[int, List[employee.Employee]]],
+                      requirements: ShiftRequirements) -> Iterator[employee.Employee]:
+    """Every assignment in the horizon's last week, one employee per shift worked"""
+    if requirements.days <= 0:
+        return
+    last_day = requirements.days - 1
+    for day in range(last_day - last_day % requirements.days_per_week, requirements.days):
+        for team in schedule.get(day, {}).values():
+            yield from team
+
+def _last_week_hours(schedule: Dict[int, Dict[int, List[employee.Employee]]],
+                     employees: List[employee.Employee], requirements: ShiftRequirements) -> Dict[str, int]:
+    """Hours each employee works in the horizon's last week, as the run ended"""
+    hours = {emp.get_name(): 0 for emp in employees}
+    for emp in _last_week_shifts(schedule, requirements):
+        hours[emp.get_name()] = hours.get(emp.get_name(), 0) + employee.SHIFT_HOURS
+    return hours
+
+# Assignment engines: the plain Python greedy and the NumPy matrix version in
+# engine.py. Both produce identical schedules.
+ENGINES = ('python', 'numpy')
+
+# Solvers: the one-pass greedy, or the greedy followed by the time-budgeted
+# branch and bound search in solver.py
+SOLVERS = ('greedy', 'branch_and_bound')
+
 class EmployeeScheduler:
     """Handles employee shift scheduling and validation"""
     
-    def __init__(self, file_path: str = None):
-        if file_path:
-            self.file_path = file_path
-        else:
-            # Try different possible file locations, coz this shit is fuckijgn me in the ass
-            possible_paths = [
-                constants.Files.EMPLOYEES.value,
-                os.path.join('Register', 'employees.txt'),
-                os.path.join('..', 'Register', 'employees.txt'),
-                'employees.txt'
-            ]
-            
-            for path in possible_paths:
-                if os.path.exists(path):
-                    self.file_path = path
-                    break
-            else:
-                # If no file is found, raise an error with helpful message
-                raise FileNotFoundError(
-                    f"Could not find employee data file. Tried paths: {', '.join(possible_paths)}\n"
-                    f"Current working directory: {os.getcwd()}\n"
-                    "Please ensure the employee data file exists in one of these locations."
-                )
-                
+    def __init__(self, file_path: str = None, engine: str = 'python',
+                 shift_requirements: Optional[ShiftRequirements] = None,
+                 employees: Optional[Union[List[employee.Employee], roster.PackedRoster]] = None,
+                 solver: str = 'greedy', time_budget: float = 1.0,
+                 weighting_policy: Optional["weighting.WeightingPolicy"] = None,
+                 roster_store: Optional["store.RosterStore"] = None, roster_name: str = 'default'):
+        """
+        Args:
+            file_path: Employee CSV file, found in the usual locations if not given
+            engine: Assignment engine, one of ENGINES
+            shift_requirements: Requirements for every shift, defaults if not given
+            employees: Schedule this in-memory roster (employees or a PackedRoster)
+                instead of reading a file
+            solver: One of SOLVERS
+            time_budget: Seconds the branch and bound solver may spend per run
+            weighting_policy: Weigh employees with this weighting.WeightingPolicy
+                instead of Employee's built-in weighting
+            roster_store: Load the roster named roster_name from this
+                store.RosterStore instead of reading a file
+            roster_name: Roster to load from roster_store
+        """
+        if engine not in ENGINES:
+            raise EmployeeSchedulerError(f"Unknown engine '{engine}', expected one of: {', '.join(ENGINES)}")
+        if solver not in SOLVERS:
+            raise EmployeeSchedulerError(f"Unknown solver '{solver}', expected one of: {', '.join(SOLVERS)}")
+        self.engine = engine
+        self.solver = solver
+        self.time_budget = time_budget
+        # Solver result of the last calculate_shifts or solve_variant
+        self.solver_result = None
+        # Called as on_slot(day, shift, assigned_employees) after each slot the
+        # scheduler's own runs solve, solve takes its own callback
+        self.on_slot: Optional[Callable[[int, int, Optional[List[employee.Employee]]], None]] = None
+        self.stats = instrumentation.SchedulerStats()
+        # Read-only indexes of the loaded roster, shared by every run
+        self._matrix = None
+        # A binary roster's column views and each loaded employee's row in them
+        self._columns = None
+        self._column_rows: Dict[int, int] = {}
+        self._index: Optional[ordering.CandidateIndex] = None
+        # (roster, availability column counts in it), see _check_layout
+        self._shift_counts: Optional[Tuple[List[employee.Employee], frozenset]] = None
+        self._lock = threading.Lock()
+        self.shift_requirements = shift_requirements or ShiftRequirements()
+
+        # Weighting inputs on top of the roster, and the roster's weights and
+        # weighting order under them, built on the first load that needs them
+        self.weighting_policy = weighting_policy
+        self._experience_updates: Dict[str, float] = {}
+        self._recent_hours: Dict[str, Tuple[int, ...]] = {}
+        self._weights = None
+        self._weights_fingerprint: Optional[str] = None
+
         self.employees: List[employee.Employee] = []
         self.schedule: Dict[int, Dict[int, List[employee.Employee]]] = {}
+        # Roster positions of a schedule served from schedule_cache, until
+        # _adopt_cached swaps this scheduler's own employees into it
+        self._cached_positions: Optional[Dict[int, Dict[int, Tuple[int, ...]]]] = None
+        # Employees whose worked hours _publish_hours last wrote
+        self._published: List[employee.Employee] = []
+
+        # Per-slot availability changes on top of the weekly pattern,
+        # {(day, shift): {employee name: available}}
+        self._availability_overrides: Dict[Tuple[int, int], Dict[str, bool]] = {}
+
+        # In-memory roster, kept untouched so every run starts from fresh copies
+        self._roster: Optional[Tuple[employee.Employee, ...]] = None
+        self._roster_fingerprint: Optional[str] = None
+        self.roster_store = roster_store
+        self.roster_name = roster_name
+        if roster_store is not None:
+            self.file_path = None
+            logger.info(f"Initialized EmployeeScheduler with roster '{roster_name}' from {roster_store.path}")
+            return
+        if employees is not None:
+            if isinstance(employees, roster.PackedRoster):
+                employees = roster.unpack_employees(employees)
+            self.file_path = None
+            self._roster = tuple(employees)
+            logger.info(f"Initialized EmployeeScheduler with {len(self._roster)} in-memory employees")
+            return
+
+        with self.stats.phase('path_resolution'):
+            self.file_path = file_path if file_path else _resolve_default_path()
         logger.info(f"Initialized EmployeeScheduler with file path: {self.file_path}")
         
     def load_employees(self) -> None:
-        """Load employees from CSV file"""
+        """Load employees from CSV file, reusing the cached parse if the file hasn't changed"""
+        self._columns = None
+        if self._roster is not None:
+            self.employees = [emp.fresh_copy() for emp in self._roster]
+        elif self.roster_store is not None:
+            self.load_employees_from_store()
+        else:
+            try:
+                self.employees = roster.roster_cache.get(self.file_path, self._read_employees)
+                if roster.is_binary_roster(self.file_path):
+                    self._map_columns()
+                logger.info(f"Successfully loaded {len(self.employees)} employees")
+            except FileNotFoundError as e:
+                logger.error(f"Employee data file not found: {self.file_path}")
+                raise FileNotFoundError(f"Could not find employee data file at {self.file_path}")
+            except csv.Error as e:
+                logger.error(f"Error reading CSV file: {e}")
+                raise EmployeeSchedulerError(f"Error reading employee data: {e}")
+        if self._custom_weighting():
+            self._apply_weights()
+
+    def _map_columns(self) -> None:
+        """Keep a binary roster's columns, so indexes are built from them rather than from every Employee"""
+        import binroster
+        columns = binroster.load(self.file_path)
+        if len(columns) != len(self.employees):
+            # Rewritten since it was parsed, the next load picks that up
+            columns.close()
+            return
+        self._columns = columns
+        self._column_rows = {id(emp): row for row, emp in enumerate(self.employees)}
+
+    def _rows(self, employees: List[employee.Employee]) -> Optional[List[int]]:
+        """Row in self._columns of each employee, None if some weren't loaded from it"""
+        if self._columns is None:
+            return None
+        rows = [self._column_rows.get(id(emp)) for emp in employees]
+        return None if None in rows else rows
+
+    def load_employees_from_store(self, roster_store: Optional["store.RosterStore"] = None,
+                                  roster_name: Optional[str] = None) -> None:
+        """
+        Load employees from a store.RosterStore instead of a CSV file
+
+        Args:
+            roster_store: Store to read, the one given to the constructor if not given
+            roster_name: Roster to read, the constructor's roster_name if not given
+        """
+        import store
+        roster_store = roster_store or self.roster_store
+        roster_name = roster_name or self.roster_name
+        if roster_store is None:
+            raise EmployeeSchedulerError("No roster store to load employees from")
         try:
-            with open(self.file_path, 'r') as file:
-                reader: DictReader = csv.DictReader(file)
-                self.employees = [self._create_employee(row) for row in reader]
-            logger.info(f"Successfully loaded {len(self.employees)} employees")
-        except FileNotFoundError as e:
-            logger.error(f"Employee data file not found: {self.file_path}")
-            raise FileNotFoundError(f"Could not find employee data file at {self.file_path}")
-        except csv.Error as e:
-            logger.error(f"Error reading CSV file: {e}")
-            raise EmployeeSchedulerError(f"Error reading employee data: {e}")
-    
+            self.employees = roster_store.get_roster(roster_name)
+        except store.StoreError as e:
+            raise EmployeeSchedulerError(str(e))
+        logger.info(f"Loaded {len(self.employees)} employees from roster '{roster_name}'")
+
+    def save_schedule(self) -> int:
+        """
+        Keep the current schedule in the roster store
+
+        Returns:
+            Id of the stored schedule
+        """
+        if self.roster_store is None:
+            raise EmployeeSchedulerError("No roster store to save the schedule to")
+        self._adopt_cached()
+        if not self.employees:
+            # Hours are stored for the whole roster, not only who was scheduled
+            self.load_employees()
+        return self.roster_store.save_schedule(self.roster_name, self.schedule, self.employees,
+                                               self.shift_requirements, self.schedule_version())
+
+    def _custom_weighting(self) -> bool:
+        return bool(self.weighting_policy is not None or self._experience_updates or self._recent_hours)
+
+    def _apply_weights(self) -> None:
+        """Put the policy's weights on the freshly loaded employees"""
+        import weighting
+        fingerprint = self._roster_version()
+        if self._weights is None or self._weights_fingerprint != fingerprint:
+            # New or changed roster, weigh all of it
+            self._weights = weighting.RosterWeights(
+                self.employees, self.weighting_policy or weighting.DEFAULT_POLICY,
+                self._experience_updates, self._recent_hours,
+            )
+            self._weights_fingerprint = fingerprint
+        self._weights.apply(self.employees)
+
+    def set_weighting_policy(self, policy: "weighting.WeightingPolicy") -> List[str]:
+        """
+        Weigh employees with another policy from the next run on
+
+        Returns:
+            Names of the employees whose weighting changed, empty if the
+            roster hasn't been weighed yet
+        """
+        self.weighting_policy = policy
+        if self._weights is None:
+            return []
+        return self._weights_changed(self._weights.set_policy(policy))
+
+    def update_weighting_inputs(self, experience: Optional[Dict[str, float]] = None,
+                                recent_hours: Optional[Dict[str, List[int]]] = None) -> List[str]:
+        """
+        Change the experience or recent weekly hours behind some employees' weighting
+
+        Only the named employees are re-weighed, and only those whose weighting
+        changes move in the weighting order. Applies from the next run on.
+
+        Args:
+            experience: New experience by employee name
+            recent_hours: Hours worked in each recent week by employee name, oldest first
+
+        Returns:
+            Names of the employees whose weighting changed, empty if the
+            roster hasn't been weighed yet
+        """
+        experience = dict(experience or {})
+        recent_hours = {name: tuple(hours) for name, hours in (recent_hours or {}).items()}
+        self._experience_updates.update(experience)
+        self._recent_hours.update(recent_hours)
+        if self._weights is None:
+            return []
+        return self._weights_changed(self._weights.update(experience, recent_hours))
+
+    def _weights_changed(self, positions: List[int]) -> List[str]:
+        names = {position: name for name, position in self._weights.positions.items()}
+        return [names[position] for position in positions]
+
     @staticmethod
-    def _create_employee(row: Dict[str, str]) -> employee.Employee:
-        """Create an employee instance from a CSV row"""
+    def _read_employees(file_path: str) -> List[employee.Employee]:
+        """Parse every employee in a CSV file or a binary roster"""
         try:
-            availability = [
-                row[shift] == 'Y' for shift in row.keys()
-                if "morning" in shift or "evening" in shift
-            ]
-            return employee.Employee(
-                name=row['name'],
-                min_hours=int(row['min_hours']),
-                bar=row['bar'] == 'True',
-                experience=float(row['experience']),
-                opening=row['opening'] == 'True',
-                closing=row['closing'] == 'True',
-                availability=availability
-            )
-        except (KeyError, ValueError) as e:
-            logger.error(f"Error creating employee from row: {row}")
+            if roster.is_binary_roster(file_path):
+                import binroster
+                with binroster.load(file_path) as mapped:
+                    return mapped.to_employees()
+            return list(roster.iter_employees(file_path))
+        except roster.RosterFormatError as e:
+            logger.error(f"Error creating employee: {e}")
             raise EmployeeSchedulerError(f"Invalid employee data format: {e}")
 
-    def sort_employees(self) -> None:
-        """Sort employees by weighting using merge sort"""
-        self.employees = self._merge_sort(self.employees)
+    def load_employees_lenient(self, chunk_size: int = roster.DEFAULT_CHUNK_SIZE) -> List[roster.RowError]:
+        """
+        Load employees from the CSV file, skipping rows that fail validation
 
-    def _merge_sort(self, employees: List[employee.Employee]) -> List[employee.Employee]:
-        """Merge sort implementation for employee list"""
-        if len(employees) <= 1:
-            return employees
-            
-        mid = len(employees) // 2
-        left = self._merge_sort(employees[:mid])
-        right = self._merge_sort(employees[mid:])
-        
-        return self._merge_auxillary(left, right)
-    
-    def _merge_auxillary(self, left: List[employee.Employee], right: List[employee.Employee]) -> List[employee.Employee]:
-        """Merge two sorted lists of employees"""
-        result = []
-        i = j = 0
-        
-        while i < len(left) and j < len(right):
-            if left[i].get_weighting() > right[j].get_weighting():
-                result.append(left[i])
-                i += 1
-            else:
-                result.append(right[j])
-                j += 1
-                
-        result.extend(left[i:])
-        result.extend(right[j:])
-        return result
+        Bypasses the roster cache, the file is streamed in chunks.
+
+        Returns:
+            The rows that were skipped
+        """
+        errors: List[roster.RowError] = []
+        try:
+            self.employees = list(roster.iter_employees(self.file_path, chunk_size, errors))
+        except roster.RosterFormatError as e:
+            raise EmployeeSchedulerError(f"Invalid employee data format: {e}")
+        for error in errors:
+            logger.warning(f"Skipped line {error.line} of {self.file_path}: {error.message}")
+        logger.info(f"Loaded {len(self.employees)} employees, skipped {len(errors)} invalid rows")
+        return errors
+
+    def sort_employees(self) -> None:
+        """Sort employees by weighting, highest first"""
+        if self._weights is not None and self._custom_weighting():
+            # Kept up to date by every weighting change, no need to sort
+            self.employees = self._weights.ordered(self.employees)
+        else:
+            self.employees = ordering.weighting_order(self.employees)
 
     def calculate_shifts(self) -> Dict[int, Dict[int, List[employee.Employee]]]:
         """
@@ -150,101 +495,557 @@ class EmployeeScheduler:
             Dict mapping days to shifts to list of assigned employees
         """
         try:
-            self.load_employees()
-            self.sort_employees()
-
-            self.shift_requirements = ShiftRequirements() #initialize ShiftRequirements
-
-            for day in range(7):
-                self.schedule[day] = {}
-                for shift in range(2):
-                    assigned_employees = self._assign_shift(day, shift)
-                    if assigned_employees:
-                        self.schedule[day][shift] = assigned_employees
-                        self._update_worked_hours(assigned_employees)
+            self.stats.reset(keep=('path_resolution',))
+            with self.stats.phase('load'):
+                self.load_employees()
+            with self.stats.phase('sort'):
+                self.sort_employees()
+            run = self._new_run(stats=self.stats, on_slot=self.on_slot)
+            self.schedule = self._run(run)
+            self._cached_positions = None
+            self._publish_hours()
+            self.solver_result = run.solver_result
+            instrumentation.metrics.record(self.stats)
             
-            logger.info("Successfully calculated shifts for the week")
+            logger.info(f"Successfully calculated shifts for {self.shift_requirements.days} days")
             return self.schedule
             
         except Exception as e:
             logger.error(f"Error calculating shifts: {e}")
             raise EmployeeSchedulerError(f"Failed to calculate shifts: {e}")
 
-    def _assign_shift(self, day: int, shift: int) -> Optional[List[employee.Employee]]:
+    def update_availability(self, name: str, day: int, shift: int,
+                            available: bool) -> Dict[int, Dict[int, List[employee.Employee]]]:
+        """
+        Change one employee's availability for a single slot and repair the schedule
+
+        Only the slots from (day, shift) onward are solved again, everything
+        before it is kept as is. Requires a schedule from calculate_shifts.
+        The repair always uses the greedy assigner.
+
+        Args:
+            name: Employee name
+            day: Day of the horizon
+            shift: Shift number within the day
+            available: New availability for that slot
+
+        Returns:
+            The repaired schedule
+        """
+        self._adopt_cached()
+        if not any(emp.get_name() == name for emp in self.employees):
+            raise EmployeeSchedulerError(f"Unknown employee '{name}'")
+        self._availability_overrides.setdefault((day, shift), {})[name] = available
+        return self.resolve_from(day, shift)
+
+    def resolve_from(self, day: int, shift: int) -> Dict[int, Dict[int, List[employee.Employee]]]:
+        """
+        Solve the schedule again from (day, shift) to the end of the horizon
+
+        Assignments before that slot are kept, and worked hours are carried
+        over from them.
+        """
+        try:
+            self._adopt_cached()
+            self.stats.reset(keep=('path_resolution',))
+            run = self._new_run(stats=self.stats, schedule=dict(self.schedule), on_slot=self.on_slot)
+            self._solve_from(run, day, shift)
+            self.schedule = run.schedule
+            self._publish_hours()
+            instrumentation.metrics.record(self.stats)
+            logger.info(f"Re-solved schedule from day {day}, shift {shift}")
+            return self.schedule
+        except Exception as e:
+            logger.error(f"Error re-solving shifts: {e}")
+            raise EmployeeSchedulerError(f"Failed to re-solve shifts: {e}")
+
+    def solve(self, shift_requirements: Optional[ShiftRequirements] = None,
+              availability_overrides: Optional[Dict[Tuple[int, int], Dict[str, bool]]] = None,
+              on_slot: Optional[Callable[[int, int, Optional[List[employee.Employee]]], None]] = None
+              ) -> RunResult:
+        """
+        Solve against the loaded roster without changing the scheduler
+
+        Safe to call from many threads at once. The roster is loaded and
+        sorted by the first call, and every call gets its own RunContext, so
+        calls share the roster and its index but nothing they write. The
+        scheduler's requirements and availability overrides are only read,
+        as defaults for arguments that aren't given. Its schedule, stats,
+        solver_result and on_slot are neither used nor changed.
+
+        Args:
+            shift_requirements: Requirements for this run, the scheduler's if not given
+            availability_overrides: Per-slot availability, {(day, shift): {name: available}},
+                the scheduler's if not given
+            on_slot: Called as on_slot(day, shift, assigned_employees) after each slot
+
+        Returns:
+            RunResult with the new schedule, its worked hours, the solver's result
+            and the run's stats
+        """
+        try:
+            self._ensure_loaded()
+            if availability_overrides is None:
+                availability_overrides = self._availability_overrides
+            run = self._new_run(shift_requirements, availability_overrides, instrumentation.SchedulerStats(),
+                                on_slot=on_slot)
+            schedule = self._run(run)
+            instrumentation.metrics.record(run.stats)
+            return RunResult(schedule=schedule,
+                             worked_hours=_last_week_hours(schedule, run.employees, run.requirements),
+                             solver_result=run.solver_result, stats=run.stats)
+        except Exception as e:
+            logger.error(f"Error solving: {e}")
+            raise EmployeeSchedulerError(f"Failed to solve: {e}")
+
+    def solve_variant(self, shift_requirements: ShiftRequirements,
+                      availability_overrides: Optional[Dict[Tuple[int, int], Dict[str, bool]]] = None
+                      ) -> Dict[int, Dict[int, List[employee.Employee]]]:
+        """
+        Solve again for other requirements and availability, keeping the loaded roster
+
+        The roster is not reloaded or re-sorted and the candidate index is
+        reused, only worked hours start over. Unlike solve, the requirements,
+        overrides and schedule become the scheduler's own.
+
+        Args:
+            shift_requirements: Requirements for this run
+            availability_overrides: Per-slot availability, {(day, shift): {name: available}},
+                replacing any set with update_availability
+
+        Returns:
+            The new schedule
+        """
+        try:
+            self._ensure_loaded()
+            self.shift_requirements = shift_requirements
+            self._availability_overrides = {
+                slot: dict(changes) for slot, changes in (availability_overrides or {}).items()
+            }
+            self.stats.reset(keep=('path_resolution',))
+            run = self._new_run(stats=self.stats, on_slot=self.on_slot)
+            self.schedule = self._run(run)
+            self._cached_positions = None
+            self._publish_hours()
+            self.solver_result = run.solver_result
+            instrumentation.metrics.record(self.stats)
+            return self.schedule
+        except Exception as e:
+            logger.error(f"Error solving variant: {e}")
+            raise EmployeeSchedulerError(f"Failed to solve variant: {e}")
+
+    def _ensure_loaded(self) -> None:
+        """Load and sort the roster if no run has yet"""
+        with self._lock:
+            if not self.employees:
+                self.load_employees()
+                self.sort_employees()
+
+    def _new_run(self, shift_requirements: Optional[ShiftRequirements] = None,
+                 availability_overrides: Optional[Dict[Tuple[int, int], Dict[str, bool]]] = None,
+                 stats: Optional[instrumentation.SchedulerStats] = None,
+                 schedule: Optional[Dict[int, Dict[int, List[employee.Employee]]]] = None,
+                 on_slot: Optional[Callable[[int, int, Optional[List[employee.Employee]]], None]] = None
+                 ) -> RunContext:
+        """A RunContext over the loaded roster, with the scheduler's settings for anything not given"""
+        stats = stats or instrumentation.SchedulerStats()
+        employees, index, matrix = self._build_indexes(stats)
+        requirements = shift_requirements or self.shift_requirements
+        self._check_layout(employees, requirements)
+        if availability_overrides is None:
+            availability_overrides = self._availability_overrides
+        return RunContext(
+            employees=employees,
+            positions=(matrix or index).positions,
+            names=(matrix or index).names,
+            index=index,
+            matrix=matrix,
+            requirements=requirements,
+            overrides={slot: dict(changes) for slot, changes in availability_overrides.items()},
+            stats=stats,
+            schedule=schedule if schedule is not None else {},
+            on_slot=on_slot,
+        )
+
+    def _check_layout(self, employees: List[employee.Employee], requirements: ShiftRequirements) -> None:
+        """
+        Make sure the roster has one availability column per slot of the week
+
+        Raises:
+            EmployeeSchedulerError: If days_per_week x shifts_per_day doesn't
+                match the roster's availability columns, which would otherwise
+                read the wrong column for every slot
+        """
+        known = self._shift_counts
+        if known is None or known[0] is not employees:
+            known = self._shift_counts = (employees, frozenset(emp.get_shift_count() for emp in employees))
+        expected = requirements.days_per_week * requirements.shifts_per_day
+        if known[1] and known[1] != {expected}:
+            columns = ', '.join(str(count) for count in sorted(known[1]))
+            raise EmployeeSchedulerError(
+                f"{requirements.days_per_week} days of {requirements.shifts_per_day} shifts need "
+                f"{expected} availability columns, the roster has {columns}")
+
+    def _run(self, run: RunContext) -> Dict[int, Dict[int, List[employee.Employee]]]:
+        """Solve the whole horizon of a run"""
+        self._solve_from(run, 0, 0)
+        if self.solver != 'greedy':
+            self._improve_schedule(run)
+        return run.schedule
+
+    def _solve_from(self, run: RunContext, start_day: int, start_shift: int) -> None:
+        """Greedily assign every slot from (start_day, start_shift) onward"""
+        requirements = run.requirements
+        self._restore_state(run, start_day, start_shift)
+
+        for day in range(start_day, requirements.days):
+            if day > start_day and day % requirements.days_per_week == 0:
+                self._start_week(run)
+            first_shift = start_shift if day == start_day else 0
+            run.schedule[day] = {
+                shift: assigned for shift, assigned in run.schedule.get(day, {}).items()
+                if shift < first_shift
+            }
+            for shift in range(first_shift, requirements.shifts_per_day):
+                start = time.perf_counter()
+                assigned_employees = self._assign_shift(run, day, shift)
+                run.stats.record_slot(day, shift, time.perf_counter() - start,
+                                      len(assigned_employees) if assigned_employees else 0)
+                self._record_slot(run, day, shift, assigned_employees)
+                if run.on_slot is not None:
+                    run.on_slot(day, shift, assigned_employees)
+
+    def _improve_schedule(self, run: RunContext) -> None:
+        """Replace the greedy schedule with the solver's best schedule within the time budget"""
+        import solver
+        if run.requirements.rules:
+            raise EmployeeSchedulerError(f"Shift rules are only enforced by the greedy solver, not '{self.solver}'")
+        with run.stats.phase('solve'):
+            result = solver.solve(run.employees, run.schedule, run.requirements,
+                                  lambda emp, day, shift: self._is_available(run, emp, day, shift),
+                                  self.time_budget)
+        run.solver_result = result
+        run.schedule = result.schedule
+        logger.info(
+            f"Solver filled {result.filled}/{result.slots} slots "
+            f"(coverage {result.coverage:.2%}, fairness {result.fairness:.3f}) "
+            f"in {result.elapsed:.3f}s, {result.nodes} nodes"
+            + (", search complete" if result.search_complete else "")
+        )
+
+    def score_schedule(self) -> "solver.ScheduleScore":
+        """Coverage and fairness of the current schedule"""
+        import solver
+        # Shortfall counts everyone on the roster, scheduled or not
+        self._adopt_cached()
+        self._ensure_loaded()
+        return solver.score(self.schedule, self.employees, self.shift_requirements)
+
+    def worked_hours(self) -> Dict[str, int]:
+        """Hours each employee works in the last week of the current schedule, by name"""
+        self._adopt_cached()
+        self._ensure_loaded()
+        return _last_week_hours(self.schedule, self.employees, self.shift_requirements)
+
+    def _is_available(self, run: RunContext, emp: employee.Employee, day: int, shift: int) -> bool:
+        """Availability for a slot of the horizon, including the run's overrides"""
+        overrides = run.overrides.get((day, shift))
+        if overrides and emp.get_name() in overrides:
+            return overrides[emp.get_name()]
+        requirements = run.requirements
+        return emp.is_available(day, shift, requirements.shifts_per_day, requirements.days_per_week)
+
+    def _restore_state(self, run: RunContext, day: int, shift: int) -> None:
+        """Set the run's worked hours and rule state to what they were just before (day, shift)"""
+        requirements = run.requirements
+        week_start = day - day % requirements.days_per_week
+        worked = [0] * len(run.employees)
+        run.rule_set = rules.RuleSet(requirements, len(run.employees))
+        # Employee rules look back across weeks, hours only to the week start
+        first_day = 0 if run.rule_set.stateful else week_start
+        for replay_day in range(first_day, day + 1):
+            if replay_day % requirements.days_per_week == 0:
+                run.rule_set.start_week()
+            for replay_shift in range(requirements.shifts_per_day):
+                if (replay_day, replay_shift) >= (day, shift):
+                    break
+                assigned = run.schedule.get(replay_day, {}).get(replay_shift) or ()
+                positions = [self._position(run, emp) for emp in assigned]
+                if replay_day >= week_start:
+                    for position in positions:
+                        worked[position] += employee.SHIFT_HOURS
+                run.rule_set.record(replay_shift, positions)
+        self._set_hours(run, worked)
+
+    def _position(self, run: RunContext, emp: employee.Employee) -> int:
+        """Roster position of a scheduled employee, by name if they come from another load"""
+        position = run.positions.get(id(emp))
+        if position is None:
+            position = run.names.get(emp.get_name())
+            if position is None:
+                raise EmployeeSchedulerError(f"Scheduled employee '{emp.get_name()}' is not on the roster")
+        return position
+
+    def _start_week(self, run: RunContext) -> None:
+        """Reset worked hours at a week boundary"""
+        self._set_hours(run, [0] * len(run.employees))
+        run.rule_set.start_week()
+
+    def _set_hours(self, run: RunContext, worked: List[int]) -> None:
+        """Give a run these worked hours by roster position"""
+        if run.matrix is not None:
+            run.worked_hours = run.matrix.hours(worked)
+        elif run.queue is not None:
+            run.worked_hours = worked
+            run.queue.reset(worked)
+        else:
+            run.worked_hours = worked
+            run.queue = ordering.DeficitQueue(run.index, worked)
+
+    def _record_slot(self, run: RunContext, day: int, shift: int,
+                     assigned: Optional[List[employee.Employee]]) -> None:
+        """Put a slot's team in the run's schedule and count its hours"""
+        positions = [run.positions[id(emp)] for emp in assigned] if assigned else []
+        if positions:
+            run.schedule.setdefault(day, {})[shift] = assigned
+            worked = run.worked_hours
+            for position in positions:
+                worked[position] += employee.SHIFT_HOURS
+                if run.queue is not None:
+                    run.queue.update(position, worked[position])
+        run.rule_set.record(shift, positions)
+
+    def _build_indexes(self, stats: instrumentation.SchedulerStats
+                       ) -> Tuple[List[employee.Employee], Optional[ordering.CandidateIndex], Any]:
+        """
+        The engine's index of the loaded roster, built once per roster
+
+        Returns:
+            (roster, CandidateIndex or None, AvailabilityMatrix or None), all
+            read-only from here on
+        """
+        with self._lock:
+            employees = self.employees
+            if self.engine == 'numpy':
+                if self._matrix is None or self._matrix.employees is not employees:
+                    import engine
+                    with stats.phase('index'):
+                        rows = self._rows(employees)
+                        self._matrix = engine.AvailabilityMatrix(employees, self._columns if rows else None, rows)
+                return employees, None, self._matrix
+            if self._index is None or self._index.employees is not employees:
+                with stats.phase('index'):
+                    rows = self._rows(employees)
+                    self._index = ordering.CandidateIndex(employees, self._columns if rows else None, rows)
+            return employees, self._index, None
+
+    def calculate_shifts_cached(self) -> Dict[int, Dict[int, List[employee.Employee]]]:
+        """
+        Same as calculate_shifts, but served from schedule_cache when the roster
+        contents and shift requirements haven't changed since a previous run
+        """
+        key = self._schedule_key()
+        cached = schedule_cache.get(key)
+        if cached is not None:
+            logger.info("Serving cached schedule")
+            # The cached employees come from another load. Repairs, scores and
+            # saves swap in this scheduler's own when they need them
+            self.schedule = cached.schedule
+            self._cached_positions = cached.positions
+            return self.schedule
+
+        schedule = self.calculate_shifts()
+        # Only store it if the roster didn't change underneath us mid-run
+        if self._schedule_key() == key:
+            positions = (self._matrix if self.engine == 'numpy' else self._index).positions
+            schedule_cache.put(key, schedule, {
+                day: {shift: tuple(positions[id(emp)] for emp in team) for shift, team in shifts.items()}
+                for day, shifts in schedule.items()
+            })
+        return schedule
+
+    def _adopt_cached(self) -> None:
+        """Put the loaded roster's employees into a schedule served from schedule_cache"""
+        if self._cached_positions is None:
+            return
+        positions, self._cached_positions = self._cached_positions, None
+        # Same roster contents and weighting as the run that stored it, so the
+        # same weighting order. By position, names needn't be unique
+        self.load_employees()
+        self.sort_employees()
+        self.schedule = {day: {shift: [self.employees[position] for position in team]
+                               for shift, team in shifts.items()}
+                         for day, shifts in positions.items()}
+        self._publish_hours()
+
+    def _publish_hours(self) -> None:
+        """
+        Write the current schedule's last week hours into its employees, for
+        the deprecated Employee.get_worked_hours()
+
+        Only the scheduler's own runs do this, solve never touches employees.
+        """
+        for emp in self._published:
+            emp._worked_hours = 0
+        self._published = list(_last_week_shifts(self.schedule, self.shift_requirements))
+        for emp in self._published:
+            emp._worked_hours += employee.SHIFT_HOURS
+
+    def schedule_version(self) -> str:
+        """
+        Fingerprint of the schedule calculate_shifts_cached would return
+
+        Changes whenever the roster contents, shift requirements, availability
+        overrides or solver settings do, so it can be used as an HTTP ETag
+        without calculating the schedule.
+        """
+        import hashlib
+        return hashlib.sha1(repr(self._schedule_key()).encode()).hexdigest()[:16]
+
+    def _roster_version(self) -> str:
+        """Content hash of the roster this scheduler loads"""
+        if self.roster_store is not None:
+            import store
+            try:
+                return self.roster_store.roster_version(self.roster_name)[1]
+            except store.StoreError as e:
+                raise EmployeeSchedulerError(str(e))
+        if self._roster is not None:
+            if self._roster_fingerprint is None:
+                self._roster_fingerprint = roster.fingerprint_employees(self._roster)
+            return self._roster_fingerprint
+        return roster.roster_cache.fingerprint(self.file_path, self._read_employees)
+
+    def _schedule_key(self) -> Tuple:
+        fingerprint = self._roster_version()
+        overrides = tuple(sorted(
+            (slot, name, available)
+            for slot, changes in self._availability_overrides.items()
+            for name, available in changes.items()
+        ))
+        solver = (self.solver, self.time_budget if self.solver != 'greedy' else None)
+        weights = None
+        if self._custom_weighting():
+            weights = (self.weighting_policy, tuple(sorted(self._experience_updates.items())),
+                       tuple(sorted(self._recent_hours.items())))
+        return fingerprint, self.shift_requirements.cache_key(), overrides, solver, weights
+
+    def _assign_shift(self, run: RunContext, day: int, shift: int) -> Optional[List[employee.Employee]]:
         """
         Assign employees to a specific shift
         
         Args:
-            day: Day of the week (0-6)
-            shift: Shift number (0-1)
+            run: The run being solved
+            day: Day of the horizon (0-6 for a single week)
+            shift: Shift number (0-1 by default)
             
         Returns:
             List of assigned employees or None if requirements can't be met
         """
-        available_employees = [
-            emp for emp in self.employees
-            if emp.is_available(day, shift) and 
-            emp.get_worked_hours() < emp.get_min_hours()
-        ]
+        if run.matrix is not None:
+            return self._assign_shift_vectorized(run, day, shift)
 
+        requirements = run.requirements
+        candidates = run.queue.candidates(
+            requirements.availability_index(day, shift),
+            run.overrides.get((day, shift)),
+        )
+        blocked = run.rule_set.blocked()
+        if blocked:
+            candidates &= ~blocked
 
-        min_employees_for_shift = self.shift_requirements.get_min_employees(day, shift) # Get the minimum number of employees for this specific shift
+        run.stats.count_candidates(day, shift, run.index.count(candidates))
 
-        if not self._validate_shift_requirements(available_employees, shift, min_employees_for_shift): # Check requirements using new parameter
-            logger.warning(f"Could not meet requirements for day {day}, shift {shift}")
-            return None
-            
-        # Prioritize employees who need more hours to meet their minimum
-        available_employees.sort(
-            key=lambda x: (
-                x.get_min_hours() - x.get_worked_hours(),
-                x.get_weighting()
-            ),
-            reverse=True
+        min_employees_for_shift = requirements.get_min_employees(day, shift) # Get the minimum number of employees for this specific shift
+        slot_rules = run.rule_set.slot(day, shift)
+
+        if not self._validate_shift_requirements(run, candidates, slot_rules, min_employees_for_shift): # Check requirements using new parameter
+            return self._requirements_not_met(run, day, shift)
+
+        # Employees who need more hours to meet their minimum come first, then weighting
+        positions = run.queue.select(  # Assign up to the specified minimum
+            candidates, min_employees_for_shift,
+            [(run.index.skills[skill], count) for skill, count in slot_rules.team],
         )
-        
-        return available_employees[:min_employees_for_shift] # Assign up to the specified minimum
+        if positions is None:
+            return self._requirements_not_met(run, day, shift)
+        return [run.employees[position] for position in positions]
+
+    def _assign_shift_vectorized(self, run: RunContext, day: int, shift: int) -> Optional[List[employee.Employee]]:
+        """Same as _assign_shift, but filtering and selection run on the availability matrix"""
+        requirements = run.requirements
+        min_employees_for_shift = requirements.get_min_employees(day, shift)
+        slot_rules = run.rule_set.slot(day, shift)
+        rows, candidates = run.matrix.select(
+            requirements.availability_index(day, shift), run.worked_hours, min_employees_for_shift,
+            pool=slot_rules.pool,
+            quotas=slot_rules.team,
+            blocked=run.rule_set.blocked(),
+            overrides=run.overrides.get((day, shift)),
+        )
+        run.stats.count_candidates(day, shift, candidates)
+        if rows is None:
+            return self._requirements_not_met(run, day, shift)
+        return run.matrix.to_employees(rows)
+
+    def _requirements_not_met(self, run: RunContext, day: int, shift: int) -> None:
+        run.stats.validation_failures += 1
+        logger.warning(f"Could not meet requirements for day {day}, shift {shift}")
+        return None
 
-    def _validate_shift_requirements(self, employees: List[employee.Employee], shift: int, min_employees_for_shift:int) -> bool: 
-        """Validate that shift requirements can be met with available employees"""
-        if len(employees) < min_employees_for_shift: # Modification: Use day/shift specific minimum
+    def _validate_shift_requirements(self, run: RunContext, candidates: int, slot_rules: rules.SlotRules,
+                                     min_employees_for_shift: int) -> bool:
+        """
+        Validate that shift requirements can be met with the candidate bitset
+
+        Skill rules need that many candidates with the skill, whether the
+        team itself has to include them or not (see rules.requirement_rules
+        for the opener, bartender and closer flags).
+        """
+        if run.index.count(candidates) < min_employees_for_shift: # Modification: Use day/shift specific minimum
             return False
-            
-        # Morning shift needs opener and bartender
-        if shift == 0 and ShiftRequirements.needs_opener:
-            has_opener = any(emp.get_opening() for emp in employees)
-            has_bartender = any(emp.get_bar() for emp in employees)
-            if not (has_opener and has_bartender):
-                return False
 
-        # Evening shift needs closer
-        if shift == 1 and ShiftRequirements.needs_closer:
-            if not any(emp.get_closing() for emp in employees):
+        for skill, count in slot_rules.pool + slot_rules.team:
+            if run.index.count(candidates & run.index.skills[skill]) < count:
                 return False
-                
+
         return True
 
-    @staticmethod
-    def _update_worked_hours(employees: List[employee.Employee]) -> None:
-        """Update worked hours for assigned employees"""
-        for emp in employees:
-            emp.add_shift()
+def _print_schedule(schedule: Dict[int, Dict[int, List[str]]],
+                    requirements: Optional[ShiftRequirements] = None) -> None:
+    """
+    Print a schedule of employee names
+
+    Args:
+        schedule: Schedule of employee names
+        requirements: Requirements the schedule was made for, to also list the
+            slots nobody could be assigned to. Only the schedule's own days
+            and shifts are printed if not given.
+    """
+    if requirements is not None:
+        days = range(requirements.days)
+        shifts = range(requirements.shifts_per_day)
+    else:
+        days = sorted(schedule)
+        shifts = sorted({shift for day_shifts in schedule.values() for shift in day_shifts})
+    for day in days:
+        print(f"\nDay {day}:")
+        for shift in shifts:
+            print(f"  Shift {shift}:")
+            if day in schedule and shift in schedule[day]:
+                for name in schedule[day][shift]:
+                    print(f"    - {name}")
+            else:
+                print("    No valid assignments found")
 
 def main():
     try:
         scheduler = EmployeeScheduler()
-        schedule = scheduler.calculate_shifts()
-        
-        # Print schedule
-        for day in range(7):
-            print(f"\nDay {day}:")
-            for shift in range(2):
-                print(f"  Shift {shift}:")
-                if day in schedule and shift in schedule[day]:
-                    for emp in schedule[day][shift]:
-                        print(f"    - {emp.get_name()}")
-                else:
-                    print("    No valid assignments found")
+        schedule = scheduler.calculate_shifts_cached()
+        _print_schedule({
+            day: {shift: [emp.get_name() for emp in emps] for shift, emps in shifts.items()}
+            for day, shifts in schedule.items()
+        }, scheduler.shift_requirements)
                     
     except EmployeeSchedulerError as e:
         logger.error(f"Scheduler error: {e}")
@@ -253,5 +1054,21 @@ def main():
         logger.error(f"Unexpected error: {e}")
         print(f"An unexpected error occurred: {e}")
 
+def main_batch(paths: List[str], max_workers: Optional[int] = None) -> None:
+    """Schedule several venues in parallel, printing each one as it finishes"""
+    import batch
+    for result in batch.schedule_many(paths, max_workers=max_workers):
+        print(f"\n=== {result.venue} ===")
+        if result.error:
+            print(f"Error: {result.error}")
+        else:
+            _print_schedule(result.schedule)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    import sys
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) > 1:
+        # python system.py venue1.txt venue2.txt ... schedules every venue
+        main_batch(sys.argv[1:])
+    else:
+        main()
\ No newline at end of file
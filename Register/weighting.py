@@ -0,0 +1,162 @@
+"""
+Configurable employee weighting.
+
+A WeightingPolicy sets the bonuses behind an employee's weighting (skills,
+part-time preference, flexibility, experience) and a penalty for recent heavy
+weeks, so each venue can weigh its staff differently. DEFAULT_POLICY gives the
+same weights as Employee._calculate_weighting.
+
+RosterWeights evaluates a policy over a whole roster as one NumPy expression
+on column arrays. Changing the policy, someone's experience or someone's
+recent hours recomputes only the rows involved, and only the employees whose
+weighting actually changed move in the kept weighting order.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+import employee
+import ordering
+
+
+@dataclass(frozen=True)
+class WeightingPolicy:
+    """Bonuses and penalties that make up an employee's weighting"""
+    bar_bonus: float = 1.0
+    opening_bonus: float = 0.5
+    closing_bonus: float = 0.5
+    # Preference for part-time workers, below this many minimum hours
+    part_time_bonus: float = 0.5
+    part_time_below_hours: int = 10
+    # Bonus for being able to both open and close
+    flexibility_bonus: float = 1.0
+    experience_factor: float = 1.0
+    # Subtracted for every week over heavy_week_hours among the last recent_weeks
+    heavy_week_penalty: float = 0.0
+    heavy_week_hours: int = 40
+    recent_weeks: int = 4
+
+    def heavy_weeks(self, weekly_hours: Sequence[int]) -> int:
+        """Number of heavy weeks among the most recent ones"""
+        recent = weekly_hours[-self.recent_weeks:] if self.recent_weeks > 0 else ()
+        return sum(1 for hours in recent if hours > self.heavy_week_hours)
+
+    def evaluate(self, bar: np.ndarray, opening: np.ndarray, closing: np.ndarray,
+                 min_hours: np.ndarray, experience: np.ndarray, heavy_weeks: np.ndarray) -> np.ndarray:
+        """
+        Weightings for columns of employee attributes
+
+        Terms are added in the same order as Employee._calculate_weighting so
+        the default policy reproduces its floats exactly.
+        """
+        weighting = np.zeros(len(bar), dtype=np.float64)
+        weighting += np.where(bar, self.bar_bonus, 0.0)
+        weighting += np.where(opening, self.opening_bonus, 0.0)
+        weighting += np.where(closing, self.closing_bonus, 0.0)
+        weighting += np.where(min_hours < self.part_time_below_hours, self.part_time_bonus, 0.0)
+        weighting += np.where(opening & closing, self.flexibility_bonus, 0.0)
+        weighting += experience * self.experience_factor
+        weighting -= heavy_weeks * self.heavy_week_penalty
+        return weighting
+
+
+DEFAULT_POLICY = WeightingPolicy()
+
+
+class RosterWeights:
+    """A roster's attribute columns, weightings under a policy, and weighting order"""
+
+    def __init__(self, employees: List[employee.Employee], policy: WeightingPolicy = DEFAULT_POLICY,
+                 experience: Optional[Mapping[str, float]] = None,
+                 recent_hours: Optional[Mapping[str, Sequence[int]]] = None):
+        """
+        Args:
+            employees: Roster, in file order
+            policy: Policy to weigh it with
+            experience: Experience by employee name, replacing the roster's values
+            recent_hours: Hours worked in each recent week by employee name, oldest first
+        """
+        n = len(employees)
+        self.policy = policy
+        self.positions: Dict[str, int] = {emp.get_name(): position for position, emp in enumerate(employees)}
+
+        self.bar = np.fromiter((emp.get_bar() for emp in employees), dtype=bool, count=n)
+        self.opening = np.fromiter((emp.get_opening() for emp in employees), dtype=bool, count=n)
+        self.closing = np.fromiter((emp.get_closing() for emp in employees), dtype=bool, count=n)
+        self.min_hours = np.fromiter((emp.get_min_hours() for emp in employees), dtype=np.int64, count=n)
+        self.experience = np.fromiter((emp.get_experience() for emp in employees), dtype=np.float64, count=n)
+        self.heavy_weeks = np.zeros(n, dtype=np.int64)
+        self.recent_hours: Dict[int, Sequence[int]] = {}
+
+        for position, value in self._known(experience or {}).items():
+            self.experience[position] = value
+        for position, hours in self._known(recent_hours or {}).items():
+            self.recent_hours[position] = hours
+            self.heavy_weeks[position] = policy.heavy_weeks(hours)
+
+        self.weights = self._evaluate(slice(None))
+        # Roster positions in weighting order, as ordering.weighting_order sorts
+        self.order: List[int] = ordering.weighting_positions(self.weights.tolist())
+
+    def _known(self, by_name: Mapping[str, object]) -> Dict[int, object]:
+        # Names not on this roster are ignored, like availability overrides
+        return {self.positions[name]: value for name, value in by_name.items() if name in self.positions}
+
+    def _evaluate(self, rows) -> np.ndarray:
+        return self.policy.evaluate(self.bar[rows], self.opening[rows], self.closing[rows],
+                                    self.min_hours[rows], self.experience[rows], self.heavy_weeks[rows])
+
+    def _commit(self, rows: np.ndarray, weights: np.ndarray) -> List[int]:
+        """Store new weights for rows and move the ones that changed"""
+        changed = rows[weights != self.weights[rows]]
+        if len(changed):
+            self.weights[rows] = weights
+            self.order = ordering.reorder(self.order, changed.tolist(), self.weights.tolist())
+        return changed.tolist()
+
+    def set_policy(self, policy: WeightingPolicy) -> List[int]:
+        """
+        Weigh the roster with another policy
+
+        Returns:
+            Positions whose weighting changed
+        """
+        self.policy = policy
+        for position, hours in self.recent_hours.items():
+            self.heavy_weeks[position] = policy.heavy_weeks(hours)
+        return self._commit(np.arange(len(self.weights)), self._evaluate(slice(None)))
+
+    def update(self, experience: Optional[Mapping[str, float]] = None,
+               recent_hours: Optional[Mapping[str, Sequence[int]]] = None) -> List[int]:
+        """
+        Change some employees' experience or recent weekly hours
+
+        Only those employees are re-weighed.
+
+        Returns:
+            Positions whose weighting changed
+        """
+        touched = set()
+        for position, value in self._known(experience or {}).items():
+            self.experience[position] = value
+            touched.add(position)
+        for position, hours in self._known(recent_hours or {}).items():
+            self.recent_hours[position] = hours
+            self.heavy_weeks[position] = self.policy.heavy_weeks(hours)
+            touched.add(position)
+        if not touched:
+            return []
+        rows = np.fromiter(sorted(touched), dtype=np.int64, count=len(touched))
+        return self._commit(rows, self._evaluate(rows))
+
+    def apply(self, employees: List[employee.Employee]) -> None:
+        """Copy experience and weightings onto employees of the same roster, in file order"""
+        for emp, experience, weight in zip(employees, self.experience.tolist(), self.weights.tolist()):
+            emp.set_experience(experience)
+            emp.set_weighting(weight)
+
+    def ordered(self, employees: List[employee.Employee]) -> List[employee.Employee]:
+        """Employees of the same roster, in file order, rearranged into weighting order"""
+        return [employees[position] for position in self.order]
@@ -0,0 +1,174 @@
+"""
+Split numbers into fixed-size groups whose averages land near a target.
+
+Used to balance experience levels across shift teams. The values are sorted
+once into a NumPy array and every step below works on that array:
+
+1. Pick the values to use. Each group needs group_size values, so the values
+   used are a contiguous window of the sorted array, and the window sums grow
+   with its start. A bisect finds the start whose average is closest to the
+   target, trying the most groups the values can reach first, and the first
+   window within WINDOW_SHARE of the tolerance is used.
+2. Deal the window out in bands of len(groups) values, smallest values of each
+   band going to the groups with the largest running sums.
+3. Optionally refine: pair the groups furthest above and below the target and
+   make the single swap between each pair that brings both closest to it.
+
+Groups still outside the tolerance are broken up and go back in the pool with
+the values outside the window, and the steps repeat on the pool until a round
+adds no groups. What is left of the pool is the leftover.
+"""
+
+from bisect import bisect_left
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+# Largest (pairs x group_size x group_size) block the refinement builds at once
+_SWAP_BLOCK = 1 << 20
+# Share of the tolerance the chosen window's average may use up, the rest is
+# left for the spread between the groups dealt from it
+WINDOW_SHARE = 0.5
+
+
+def organize_into_groups(numbers: Sequence[float], group_size: int, target_avg: float,
+                         tolerance: float = 0.1, refine: bool = True,
+                         max_passes: int = 20) -> Tuple[List[list], list]:
+    """
+    Organize a list of numbers into groups that have averages close to the target.
+
+    Args:
+        numbers: Numbers to organize, left unmodified
+        group_size: Size of each group
+        target_avg: Desired average for each group
+        tolerance: Acceptable deviation from target average
+        refine: Run the swap-based local search after the initial grouping
+        max_passes: Most local search passes to run
+
+    Returns:
+        (groups that satisfy the conditions, leftover numbers in ascending order)
+    """
+    if group_size < 1:
+        raise ValueError(f"group_size must be at least 1, got {group_size}")
+
+    pool = np.sort(np.asarray(numbers))
+    groups: List[list] = []
+    while True:
+        count, start = _choose_window(pool, group_size, target_avg, tolerance * WINDOW_SHARE)
+        if count == 0:
+            break
+        end = start + count * group_size
+        dealt = _deal(pool[start:end], count, group_size)
+        if refine:
+            _refine(dealt, target_avg * group_size, tolerance * group_size, max_passes)
+
+        accepted: List[list] = []
+        rejected: list = []
+        for group in dealt.tolist():
+            # Checked the way callers will check it, summing the list in order
+            if abs(sum(group) / group_size - target_avg) <= tolerance:
+                accepted.append(group)
+            else:
+                rejected.extend(group)
+        if not accepted:
+            break
+        groups.extend(accepted)
+        pool = np.sort(np.concatenate((pool[:start], pool[end:], np.asarray(rejected, dtype=pool.dtype))))
+    return groups, pool.tolist()
+
+
+def _choose_window(values: np.ndarray, group_size: int, target_avg: float,
+                   max_deviation: float) -> Tuple[int, int]:
+    """
+    Most groups whose window of sorted values averages within max_deviation
+
+    Returns:
+        (number of groups, start of the window)
+    """
+    prefix = np.concatenate(([0], np.cumsum(values, dtype=np.float64))).tolist()
+    total = len(values)
+
+    def in_reach(groups: int) -> bool:
+        # The lowest and highest windows bound every window's average
+        size = groups * group_size
+        lowest = prefix[size] / size
+        highest = (prefix[total] - prefix[total - size]) / size
+        return lowest - max_deviation <= target_avg <= highest + max_deviation
+
+    def best_start(groups: int) -> Tuple[int, float]:
+        size = groups * group_size
+        # Window sums are non-decreasing in the start
+        start = bisect_left(range(total - size + 1), target_avg * size,
+                            key=lambda s: prefix[s + size] - prefix[s])
+        starts = [s for s in (start - 1, start) if 0 <= s <= total - size]
+        start = min(starts, key=lambda s: abs(prefix[s + size] - prefix[s] - target_avg * size))
+        return start, abs((prefix[start + size] - prefix[start]) / size - target_avg)
+
+    # Fewer groups can reach further from the overall average, so the
+    # reachable counts run from 1 up to some limit
+    low, high = 0, total // group_size
+    while low < high:
+        middle = (low + high + 1) // 2
+        if in_reach(middle):
+            low = middle
+        else:
+            high = middle - 1
+
+    # Window averages move in steps, a reachable count can still step over
+    # the target, so walk down to the first one that lands on it
+    for groups in range(low, 0, -1):
+        start, deviation = best_start(groups)
+        if deviation <= max_deviation:
+            return groups, start
+    return 0, 0
+
+
+def _deal(window: np.ndarray, count: int, group_size: int) -> np.ndarray:
+    """Deal sorted values band by band, smallest to the groups furthest ahead"""
+    groups = np.empty((count, group_size), dtype=window.dtype)
+    sums = np.zeros(count, dtype=np.float64)
+    for band, values in enumerate(window.reshape(group_size, count)):
+        # Stable so the first band (all sums equal) goes out in order
+        order = np.argsort(-sums, kind='stable')
+        groups[order, band] = values
+        sums[order] += values
+    return groups
+
+
+def _refine(groups: np.ndarray, target_sum: float, tolerance_sum: float, max_passes: int) -> None:
+    """Swap values between groups above and below the target, in place"""
+    count, group_size = groups.shape
+    for _ in range(max_passes):
+        deviation = groups.sum(axis=1) - target_sum
+        order = np.argsort(deviation)
+        pairs = count // 2
+        high, low = order[::-1][:pairs], order[:pairs]
+        # Pairs where both groups are within tolerance are already done
+        todo = np.maximum(np.abs(deviation[high]), np.abs(deviation[low])) > tolerance_sum
+        high, low = high[todo], low[todo]
+        if not len(high):
+            return
+
+        improved = False
+        block = max(1, _SWAP_BLOCK // (group_size * group_size))
+        for first in range(0, len(high), block):
+            above, below = high[first:first + block], low[first:first + block]
+            above_dev, below_dev = deviation[above], deviation[below]
+            # Moving diff = x - y from the group above to the one below
+            diff = groups[above][:, :, None] - groups[below][:, None, :]
+            worst = np.maximum(np.abs(above_dev[:, None, None] - diff),
+                               np.abs(below_dev[:, None, None] + diff))
+            flat = worst.reshape(len(above), -1)
+            choice = flat.argmin(axis=1)
+            better = flat[np.arange(len(above)), choice] < np.maximum(np.abs(above_dev), np.abs(below_dev))
+            if not better.any():
+                continue
+
+            improved = True
+            above, below, choice = above[better], below[better], choice[better]
+            x, y = choice // group_size, choice % group_size
+            taken = groups[above, x].copy()
+            groups[above, x] = groups[below, y]
+            groups[below, y] = taken
+        if not improved:
+            return